@@ -1,5 +1,7 @@
 import streamlit as st
 
+from infra.images import responsive_image
+
 ##################################################
 # Config default settings of the page.
 ##################################################
@@ -25,7 +27,8 @@ Rx or Scaled""")
 
 left_co, cent_co, last_co = st.columns(3)
 with cent_co:
-    st.image("crossfit-open-2026.png")
+    # Variantes AVIF / WebP statiques (python -m infra.images) au lieu du PNG de 700 Ko
+    responsive_image("crossfit-open-2026.png", alt="CrossFit Open 2026")
 
 st.header("Next stage ⇒ Semifinals")
 st.markdown("The top athletes and teams from the Open.")
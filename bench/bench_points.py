@@ -0,0 +1,75 @@
+# bench/bench_points.py
+"""
+Micro-benchmark des points de l'Overall sur une division synthétique (bench.synthetic) :
+boucle historique de pages/Classement.py (listes triées, points = i + 1, dict par athlète)
+vs infra.points.overall_points (pandas, RANK « min », WOD non saisi = effectif + 1).
+
+Usage : python -m bench.bench_points [--athletes 10000 100000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from bench.synthetic import make_athletes, make_scores
+from infra.points import overall_points
+
+SORT_DESC = {"26.1": True, "26.2": False, "26.3": False}
+
+
+def dict_loop(user_ids, wods, values) -> dict[int, int]:
+    # Reprise de l'ancienne boucle : tri Python par WOD, points = position dans la liste
+    # (ex aequo départagés par l'ordre des lignes), invalide forcé à 10**9 (temps) / 0 (reps)
+    per_wod: dict[str, list[tuple[int, float]]] = {}
+    for user_id, wod, value in zip(user_ids, wods, values, strict=True):
+        if value is None or np.isnan(value):
+            value = 0 if SORT_DESC[wod] else 10**9
+        per_wod.setdefault(wod, []).append((user_id, value))
+    points: dict[int, int] = {}
+    for wod, athletes in per_wod.items():
+        athletes.sort(key=lambda x: x[1], reverse=SORT_DESC[wod])
+        for i, (user_id, _) in enumerate(athletes):
+            points[user_id] = points.get(user_id, 0) + i + 1
+    return dict(sorted(points.items(), key=lambda x: x[1]))
+
+
+def _best_of(fn, args: tuple, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--athletes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for n in args.athletes:
+        rng = np.random.default_rng(0)
+        scores = make_scores(make_athletes(n, rng), rng)
+        user_ids = [s["user_id"] for s in scores]
+        wods = [s["wod"] for s in scores]
+        values = [float(s["score_value"]) for s in scores]
+
+        loop = dict_loop(user_ids, wods, values)
+        table = overall_points(user_ids, wods, values, SORT_DESC)
+        # Athlètes dont les points changent : ex aequo et WODs non saisis désormais comptés
+        changed = sum(loop[u] != p for u, p in zip(table.index, table["points"], strict=True))
+
+        t_loop = _best_of(dict_loop, (user_ids, wods, values), args.repeat)
+        t_vec = _best_of(overall_points, (user_ids, wods, values, SORT_DESC), args.repeat)
+        print(f"athletes={n} scores={len(scores)} points modifiés={changed}")
+        print(f"  boucle dict     : {t_loop * 1000:9.1f} ms")
+        print(f"  overall_points  : {t_vec * 1000:9.1f} ms")
+        print(f"  speedup         : {t_loop / t_vec:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# bench/bench_scoring.py
+"""
+Micro-benchmark du parsing des scores : DataFrame.apply(axis=1) ligne à ligne
+(chemin historique de pages/Statistics.py) vs parse_scores vectorisé.
+
+Usage : python -m bench.bench_scoring [--rows 100000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from infra.scoring import parse_score, parse_scores
+
+WODS = [("26.1", "reps", None), ("26.2", "time", 12 * 60), ("26.3", "time", 20 * 60)]
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(WODS), rows)
+    values = []
+    for i in idx:
+        _, wod_type, cap = WODS[i]
+        if wod_type == "reps":
+            values.append(str(rng.integers(20, 300)))
+        elif rng.random() < 0.3:
+            values.append(f"CAP:{rng.integers(1, 120):02d}")
+        else:
+            secs = int(rng.integers(240, cap))
+            values.append(f"{secs // 60}:{secs % 60:02d}")
+    return pd.DataFrame(
+        {
+            "ScoreBrut": values,
+            "Type": [WODS[i][1] for i in idx],
+            "CapSec": [WODS[i][2] for i in idx],
+        }
+    )
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    data = make_frame(args.rows)
+
+    def row_wise():
+        return data.apply(
+            lambda r: parse_score(r["ScoreBrut"], r["Type"], r["CapSec"]), axis=1
+        ).to_numpy(dtype="float64", na_value=np.nan)
+
+    def vectorized():
+        return parse_scores(data["ScoreBrut"], data["Type"], data["CapSec"])
+
+    np.testing.assert_array_equal(row_wise(), vectorized())
+
+    t_apply = _best_of(row_wise, args.repeat)
+    t_vec = _best_of(vectorized, args.repeat)
+    print(f"rows={args.rows}")
+    print(f"apply(axis=1)  : {t_apply * 1000:9.1f} ms")
+    print(f"parse_scores   : {t_vec * 1000:9.1f} ms")
+    print(f"speedup        : {t_apply / t_vec:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# bench/bench_suite.py
+"""
+Benchmark du classement et des statistiques sur données synthétiques (bench.synthetic).
+
+Pour chaque taille : base fraîche, puis chaque cas est chronométré `--repeat` fois
+(p50 / p95 / moyenne en ms) et mesuré une fois sous tracemalloc (pic mémoire Python).
+Sortie JSON sur stdout (et dans --out si fourni).
+
+Usage : python -m bench.bench_suite [--sizes 1000 10000 100000] [--repeat 20]
+        [--url-template postgresql://localhost/bench_{n}]   (bases vides et jetables)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import numpy as np
+from sqlalchemy import create_engine
+
+from bench.synthetic import SEASON, populate
+from infra.db import get_engine, get_session, reset_engines
+from infra.models import DEFAULT_BOX
+from infra.ranking import (
+    athlete_rank,
+    classement_overall,
+    leaderboard_overall,
+    leaderboard_wod,
+    refresh_leaderboard,
+)
+from infra.stats import wod_statistics, wod_statistics_exact
+
+WODS = ["26.1", "26.2", "26.3"]
+DIVISION = ("Male", "RX")
+
+
+def _refresh_division() -> None:
+    with get_session() as s:
+        refresh_leaderboard(s, "26.2", *DIVISION, DEFAULT_BOX)
+
+
+CASES: dict[str, Callable[[], object]] = {
+    # écriture d'un score : rafraîchissement du classement matérialisé de la division
+    "refresh_leaderboard": _refresh_division,
+    # lecture Classement (WOD / Overall) depuis la table matérialisée
+    "leaderboard_wod": lambda: leaderboard_wod("26.2", SEASON, *DIVISION),
+    "leaderboard_overall": lambda: leaderboard_overall(SEASON, *DIVISION),
+    # panneau "Mon classement" : places + effectifs par index, sans classement complet
+    "athlete_rank": lambda: athlete_rank(1, SEASON, *DIVISION),
+    # agrégation Overall calculée à la volée (une requête)
+    "classement_overall": lambda: classement_overall(SEASON, *DIVISION, WODS),
+    # page Statistics : agrégats d'un WOD (sketches persistés / parcours exact des scores)
+    "wod_statistics": lambda: wod_statistics("26.3"),
+    "wod_statistics_exact": lambda: wod_statistics_exact("26.3"),
+}
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    fn()  # échauffement (connexions, caches du SGBD)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "mean_ms": float(np.mean(timings)),
+        "peak_kib": peak / 1024,
+        "repeat": repeat,
+    }
+
+
+def run(sizes: list[int], repeat: int, url_template: str, cases: list[str]) -> dict:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            url = url_template.format(n=n, tmp=tmp_dir)
+            counts = populate(create_engine(url), n)
+            os.environ["DATABASE_URL"] = url
+            reset_engines()
+            get_engine()
+            for name in cases:
+                results.append(
+                    {
+                        "athletes": n,
+                        "scores": counts["scores"],
+                        "case": name,
+                        **measure(CASES[name], repeat),
+                    }
+                )
+            reset_engines()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "dialect": url_template.split(":", 1)[0],
+            "division": list(DIVISION),
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark classement / statistiques.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--url-template",
+        default="sqlite:///{tmp}/bench_{n}.db",
+        help="URL par taille ({n} = nombre d'athlètes, {tmp} = dossier temporaire)",
+    )
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--out", help="fichier JSON de sortie")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat, args.url_template, args.cases)
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload)
+    print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# bench/synthetic.py
+"""
+Générateur de données synthétiques : N athlètes (sexe, niveau, catégorie d'âge) avec des
+scores réalistes pour 26.1 (reps), 26.2 et 26.3 (temps / CAP).
+
+Usage : python -m bench.synthetic --url sqlite:///bench.db --athletes 10000
+(la base doit être vide ou jetable : le schéma est créé via infra.migrations)
+"""
+
+from __future__ import annotations
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import Engine
+
+from infra.cache import bump_data_version
+from infra.migrations import migrate
+from infra.models import DEFAULT_BOX, Score, User
+from infra.ranking import refresh_leaderboard
+from infra.sketches import rebuild_sketches
+
+BATCH_SIZE = 10_000
+PARTICIPATION = 0.9  # probabilité qu'un athlète saisisse un score pour un WOD donné
+SEASON = 2026  # saison des WODs 26.x (seed de infra.migrations)
+
+# (wod, timecap, part des athlètes finissant avant le cap, temps min)
+TIMED_WODS = [("26.2", 12 * 60, 0.6, 6 * 60), ("26.3", 20 * 60, 0.4, 11 * 60)]
+
+
+def _category(age: int) -> str:
+    # Même découpage que pages/Authentification.calculate_age_category
+    if age <= 17:
+        return "Teenager"
+    return "Elite" if age < 35 else "Masters"
+
+
+def make_athletes(n: int, rng: np.random.Generator) -> list[dict]:
+    year = datetime.now().year
+    sexes = rng.choice(["Male", "Female"], n)
+    levels = rng.choice(["RX", "Scaled"], n, p=[0.4, 0.6])
+    birth_years = rng.integers(year - 65, year - 14, n)
+    return [
+        {
+            "id": i + 1,
+            "name": f"Athlete {i + 1}",
+            "email": f"athlete{i + 1}@bench.local",
+            "password": "bench",
+            "sex": str(sexes[i]),
+            "birth_year": int(birth_years[i]),
+            "level": str(levels[i]),
+            "category": _category(year - int(birth_years[i])),
+            "age": year - int(birth_years[i]),
+            "box": DEFAULT_BOX,
+        }
+        for i in range(n)
+    ]
+
+
+def make_scores(athletes: list[dict], rng: np.random.Generator) -> list[dict]:
+    n = len(athletes)
+    rx = np.array([a["level"] == "RX" for a in athletes])
+    male = np.array([a["sex"] == "Male" for a in athletes])
+    scores = []
+
+    # 26.1 : AMRAP, répétitions ~ normales (RX et hommes légèrement au-dessus)
+    reps = rng.normal(150 + 25 * rx + 10 * male, 35).clip(10, 400).astype(int)
+    for i in np.flatnonzero(rng.random(n) < PARTICIPATION):
+        scores.append(
+            {
+                "user_id": int(i) + 1,
+                "wod": "26.1",
+                "score": str(reps[i]),
+                "score_value": int(reps[i]),
+                "season": SEASON,
+                "box": DEFAULT_BOX,
+            }
+        )
+
+    for wod, cap, finish_rate, fastest in TIMED_WODS:
+        finished = rng.random(n) < finish_rate + 0.15 * rx
+        times = rng.triangular(fastest, cap * 0.85, cap - 1, n).astype(int)
+        missing = rng.gamma(2.0, 15.0, n).clip(1, 999).astype(int)
+        for i in np.flatnonzero(rng.random(n) < PARTICIPATION):
+            if finished[i]:
+                raw, value = f"{times[i] // 60}:{times[i] % 60:02d}", int(times[i])
+            else:
+                raw, value = f"CAP:{missing[i]:02d}", cap + int(missing[i])
+            scores.append(
+                {
+                    "user_id": int(i) + 1,
+                    "wod": wod,
+                    "score": raw,
+                    "score_value": value,
+                    "season": SEASON,
+                    "box": DEFAULT_BOX,
+                }
+            )
+    return scores
+
+
+def populate(engine: Engine, athletes: int, seed: int = 0) -> dict:
+    """Crée le schéma, insère les athlètes et leurs scores, reconstruit classement et sketches."""
+    migrate(engine)
+    rng = np.random.default_rng(seed)
+    users = make_athletes(athletes, rng)
+    scores = make_scores(users, rng)
+    with engine.begin() as conn:
+        for start in range(0, len(users), BATCH_SIZE):
+            conn.execute(insert(User), users[start : start + BATCH_SIZE])
+        for start in range(0, len(scores), BATCH_SIZE):
+            conn.execute(insert(Score), scores[start : start + BATCH_SIZE])
+        if engine.dialect.name == "postgresql":
+            # ids explicites : recaler la séquence pour les inscriptions suivantes
+            conn.execute(
+                text("SELECT setval(pg_get_serial_sequence('users', 'id'), max(id)) FROM users")
+            )
+        refresh_leaderboard(conn)
+        rebuild_sketches(conn)
+        bump_data_version(conn)
+    return {"athletes": len(users), "scores": len(scores)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Génère des athlètes et scores synthétiques.")
+    parser.add_argument("--url", required=True, help="ex. sqlite:///bench.db (base jetable)")
+    parser.add_argument("--athletes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = populate(create_engine(args.url), args.athletes, args.seed)
+    print(f"{counts['athletes']} athlètes, {counts['scores']} scores -> {args.url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+# infra/api.py
+"""
+API JSON légère (lecture seule) pour les écrans de la box : classement, position d'un
+athlète, statistiques et catalogue, servis par les mêmes fonctions que les pages
+(infra.ranking, infra.stats, infra.wods) et le même cache de résultats (infra.cache).
+
+Chaque réponse porte un ETag dérivé de la version des données (data_version) et un
+Cache-Control : un écran qui interroge toutes les quelques secondes renvoie If-None-Match
+et reçoit un 304 sans corps ni requête de classement tant qu'aucun score n'a changé.
+La version elle-même est relue au plus toutes les VERSION_CHECK_SECONDS.
+
+GET /api/leaderboard?sex=Male&level=RX[&wod=26.1|Overall][&season=2026][&box=main]
+                    [&after=PLACE:USER_ID][&limit=50]
+GET /api/athlete/<user_id>?season=2026        (sexe et niveau lus dans le profil)
+GET /api/stats?wod=26.1[&box=main]
+GET /api/wods[?season=2026][&box=main]
+GET /health
+
+CLI : python -m infra.api [--host 0.0.0.0] [--port 8502]
+      (DATABASE_URL=sqlite:///bench.db pour tester en local)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import threading
+import time
+from collections.abc import Callable
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import text
+
+from infra.cache import cached, data_version
+from infra.db import db_setting, get_session
+from infra.models import DEFAULT_BOX
+from infra.ranking import (
+    PAGE_SIZE,
+    athlete_rank,
+    leaderboard_overall_page,
+    leaderboard_wod_page,
+)
+from infra.stats import wod_statistics
+from infra.wods import current_season, get_wod, wod_codes
+
+API_VERSION = 1  # fait partie de l'ETag : un changement de format invalide les réponses gardées
+MAX_LIMIT = 200
+VERSION_CHECK_SECONDS = 1.0
+
+_USER_DIVISION_SQL = text("SELECT sex, level FROM users WHERE id = :id")
+
+leaderboard_overall_page = cached("api")(leaderboard_overall_page)
+leaderboard_wod_page = cached("api")(leaderboard_wod_page)
+athlete_rank = cached("api")(athlete_rank)
+wod_statistics = cached("api")(wod_statistics)
+
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class _Version:
+    """data_version relue au plus toutes les VERSION_CHECK_SECONDS (304 sans requête)."""
+
+    def __init__(self):
+        self.value = 0
+        self.checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        with self._lock:
+            if time.monotonic() - self.checked_at >= VERSION_CHECK_SECONDS:
+                self.value = data_version()
+                self.checked_at = time.monotonic()
+            return self.value
+
+
+_VERSION = _Version()
+
+
+def _param(query: dict[str, list[str]], name: str, default: str | None = None) -> str | None:
+    values = query.get(name)
+    return values[-1] if values and values[-1] != "" else default
+
+
+def _required(query: dict[str, list[str]], name: str) -> str:
+    value = _param(query, name)
+    if value is None:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"Paramètre '{name}' requis.")
+    return value
+
+
+def _int(query: dict[str, list[str]], name: str, default: int | None = None) -> int | None:
+    value = _param(query, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"'{name}' doit être un entier.") from None
+
+
+def _season(query: dict[str, list[str]]) -> int:
+    season = _int(query, "season", current_season())
+    if season is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "Aucune saison au catalogue.")
+    return season
+
+
+def _box(query: dict[str, list[str]]) -> str:
+    return _param(query, "box") or db_setting("box", DEFAULT_BOX) or DEFAULT_BOX
+
+
+def leaderboard(query: dict[str, list[str]]) -> dict:
+    sex, level = _required(query, "sex"), _required(query, "level")
+    wod = _param(query, "wod", "Overall")
+    box = _box(query)
+    limit = min(max(_int(query, "limit", PAGE_SIZE), 1), MAX_LIMIT)
+    after = _param(query, "after")
+    cursor = None
+    if after is not None:
+        match = re.fullmatch(r"(\d+):(\d+)", after)
+        if match is None:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "'after' attendu sous la forme PLACE:USER_ID.")
+        cursor = (int(match[1]), int(match[2]))
+
+    if wod == "Overall":
+        season = _season(query)
+        page = leaderboard_overall_page(season, sex, level, box, cursor, limit)
+    else:
+        info = get_wod(wod)
+        if info is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"WOD inconnu : '{wod}'.")
+        season = info.season
+        page = leaderboard_wod_page(wod, season, sex, level, box, cursor, limit)
+    return {
+        "wod": wod,
+        "season": season,
+        "box": box,
+        "sex": sex,
+        "level": level,
+        "rows": page["rows"],
+        "next": f"{page['next'][0]}:{page['next'][1]}" if page["next"] else None,
+    }
+
+
+def athlete(query: dict[str, list[str]], user_id: int) -> dict:
+    with get_session(readonly=True) as s:
+        division = s.execute(_USER_DIVISION_SQL, {"id": user_id}).first()
+    if division is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Athlète inconnu : {user_id}.")
+    season = _season(query)
+    sex, level = division
+    return {
+        "user_id": user_id,
+        "season": season,
+        "sex": sex,
+        "level": level,
+        "ranks": athlete_rank(user_id, season, sex, level),
+    }
+
+
+def stats(query: dict[str, list[str]]) -> dict:
+    wod = _required(query, "wod")
+    if get_wod(wod) is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"WOD inconnu : '{wod}'.")
+    box = _box(query)
+    result = wod_statistics(wod, box)
+    if result is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Aucun score pour '{wod}'.")
+    return {"wod": wod, "box": box, **result}
+
+
+def wods(query: dict[str, list[str]]) -> dict:
+    season = _int(query, "season")
+    box = _box(query)
+    return {
+        "season": season,
+        "box": box,
+        "wods": [get_wod(w)._asdict() for w in wod_codes(season, box)],
+    }
+
+
+_ROUTES: dict[str, Callable[[dict[str, list[str]]], dict]] = {
+    "/api/leaderboard": leaderboard,
+    "/api/stats": stats,
+    "/api/wods": wods,
+}
+_ATHLETE_PATH = re.compile(r"/api/athlete/(\d+)")
+
+
+def etag(version: int) -> str:
+    return f'"{API_VERSION}-{version}"'
+
+
+def _json_default(value):
+    # Scalaires numpy (déciles, moyennes des sketches)
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Non sérialisable en JSON : {type(value).__name__}")
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "CrossFitOpenAPI/1"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            self._send(HTTPStatus.OK, {"status": "ok"}, cache=False)
+            return
+        athlete_match = _ATHLETE_PATH.fullmatch(url.path)
+        route = _ROUTES.get(url.path)
+        if route is None and athlete_match is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Route inconnue : {url.path}"}, cache=False)
+            return
+
+        tag = etag(_VERSION.get())
+        if_none_match = (self.headers.get("If-None-Match") or "").replace("W/", "")
+        if tag in (t.strip() for t in if_none_match.split(",")):
+            self._send(HTTPStatus.NOT_MODIFIED, None, tag)
+            return
+        query = parse_qs(url.query)
+        try:
+            body = route(query) if route else athlete(query, int(athlete_match[1]))
+        except ApiError as exc:
+            self._send(exc.status, {"error": str(exc)}, cache=False)
+            return
+        self._send(HTTPStatus.OK, body, tag)
+
+    def _send(
+        self, status: HTTPStatus, body: dict | None, tag: str | None = None, cache: bool = True
+    ) -> None:
+        payload = (
+            json.dumps(body, ensure_ascii=False, default=_json_default).encode()
+            if body is not None
+            else b""
+        )
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Expose-Headers", "ETag")
+        if cache and tag:
+            max_age = db_setting("api_max_age", "5")
+            self.send_header("ETag", tag)
+            self.send_header("Cache-Control", f"public, max-age={max_age}, must-revalidate")
+        else:
+            self.send_header("Cache-Control", "no-store")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def log_message(self, format: str, *args) -> None:
+        # Un écran qui interroge toutes les secondes : pas de ligne par 304
+        if len(args) < 2 or args[1] != str(HTTPStatus.NOT_MODIFIED.value):
+            super().log_message(format, *args)
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8502) -> ThreadingHTTPServer:
+    """Serveur prêt à servir (port=0 : port libre, cf. server.server_address)."""
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API JSON du classement (lecture seule).")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"API sur http://{args.host}:{server.server_address[1]}/api/leaderboard")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
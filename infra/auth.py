@@ -0,0 +1,80 @@
+# infra/auth.py
+"""
+Identité de l'athlète connecté, gardée dans st.session_state["user"] entre les reruns.
+
+Le profil (id + champs affichés / utilisés pour le classement) est chargé une fois à la
+connexion ; les pages le lisent via current_user() sans requête. Il est rechargé après
+une modification du compte (refresh_current_user) et effacé à la déconnexion.
+"""
+
+from __future__ import annotations
+
+try:
+    import streamlit as st  # type: ignore
+except Exception:  # pragma: no cover
+    st = None  # type: ignore
+
+from infra.db import db_setting, get_session
+from infra.models import DEFAULT_BOX, User
+
+SESSION_KEY = "user"
+PROFILE_FIELDS = ("id", "name", "email", "sex", "birth_year", "level", "category", "age", "box")
+
+
+def profile_of(user: User) -> dict:
+    """Profil mis en cache (sans le hash du mot de passe)."""
+    return {field: getattr(user, field) for field in PROFILE_FIELDS}
+
+
+def set_current_user(user: User | None) -> None:
+    st.session_state[SESSION_KEY] = profile_of(user) if user is not None else None
+
+
+def current_user() -> dict | None:
+    """
+    Profil de l'athlète connecté, sans aller-retour DB. Une session ouverte avant l'ajout
+    d'un champ (profil sans 'id', sans 'box') est complétée une seule fois par email.
+    """
+    profile = st.session_state.get(SESSION_KEY)
+    if profile and any(field not in profile for field in PROFILE_FIELDS):
+        with get_session(readonly=True) as s:
+            set_current_user(s.query(User).filter_by(email=profile["email"]).first())
+        profile = st.session_state[SESSION_KEY]
+    return profile
+
+
+def refresh_current_user() -> dict | None:
+    """Recharge le profil depuis la base (après modification du compte)."""
+    profile = st.session_state.get(SESSION_KEY)
+    if not profile:
+        return None
+    with get_session(readonly=True) as s:
+        if "id" in profile:
+            user = s.get(User, profile["id"])
+        else:
+            user = s.query(User).filter_by(email=profile["email"]).first()
+        set_current_user(user)
+    return st.session_state[SESSION_KEY]
+
+
+def current_box() -> str:
+    """Box affichée : celle de l'athlète connecté, sinon celle du déploiement (setting 'box')."""
+    profile = current_user()
+    if profile:
+        return profile["box"]
+    return db_setting("box", DEFAULT_BOX) or DEFAULT_BOX
+
+
+def is_coach(profile: dict | None) -> bool:
+    """
+    Compte autorisé à importer des scores : email listé dans le setting 'coach_emails'
+    ("a@box.fr,b@box.fr"). Refus par défaut (liste absente ou vide).
+    """
+    if not profile:
+        return False
+    coaches = {e.strip().lower() for e in (db_setting("coach_emails") or "").split(",")}
+    return profile["email"].strip().lower() in coaches - {""}
+
+
+def logout() -> None:
+    st.session_state[SESSION_KEY] = None
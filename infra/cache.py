@@ -0,0 +1,150 @@
+# infra/cache.py
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.db import get_session, run_async
+
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_MAXSIZE = 256
+
+
+class ResultCache:
+    """Cache LRU borné en taille, avec TTL par entrée et compteurs hits/misses/evictions."""
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._data[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+_CACHE = ResultCache()
+
+
+# ---------- Version des données ----------
+# Compteur (table 'data_version', ligne id=1) incrémenté dans la transaction de chaque
+# écriture : une nouvelle version rend les entrées précédentes inaccessibles.
+def bump_data_version(conn: Session | Connection) -> None:
+    conn.execute(text("UPDATE data_version SET version = version + 1 WHERE id = 1"))
+
+
+def data_version() -> int:
+    with get_session(readonly=True) as s:
+        return s.execute(text("SELECT version FROM data_version WHERE id = 1")).scalar() or 0
+
+
+def cached(page: str, ttl: float | None = None) -> Callable[[Callable], Callable]:
+    """
+    Met en cache le résultat de la fonction décorée, clé = (page, fonction, filtres, version).
+    Les arguments (filtres) doivent être hashables ; le résultat ne doit pas être muté.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (page, fn.__qualname__, args, tuple(sorted(kwargs.items())), data_version())
+            hit, value = _CACHE.get(key)
+            if hit:
+                return value
+            value = fn(*args, **kwargs)
+            _CACHE.set(key, value, ttl)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def cached_gather(
+    page: str, *calls: tuple[Callable[..., Awaitable], tuple], ttl: float | None = None
+) -> list:
+    """
+    Plusieurs lectures d'une page en un temps : calls = (fonction *_async, args) ; résultats
+    dans l'ordre des appels. Version lue une fois, lectures absentes du cache lancées en
+    parallèle (asyncio.gather) : ~2 allers-retours quel que soit leur nombre.
+    Clé identique à celle de la variante synchrone sous cached() (même nom sans '_async') :
+    prefetch() et cached_gather() partagent leurs entrées.
+    """
+    version = data_version()
+    keys = [(page, fn.__qualname__.removesuffix("_async"), args, (), version) for fn, args in calls]
+    results: list = []
+    missing: list[int] = []
+    for i, key in enumerate(keys):
+        hit, value = _CACHE.get(key)
+        results.append(value)
+        if not hit:
+            missing.append(i)
+    if missing:
+        values = run_async(_gather(*(calls[i][0](*calls[i][1]) for i in missing)))
+        for i, value in zip(missing, values, strict=True):
+            results[i] = value
+            _CACHE.set(keys[i], value, ttl)
+    return results
+
+
+async def _gather(*aws: Awaitable) -> list:
+    return list(await asyncio.gather(*aws))
+
+
+_PREFETCH = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+
+
+def prefetch(fn: Callable, *args, **kwargs) -> None:
+    """
+    Appelle en arrière-plan une fonction décorée par cached() (ex. page suivante d'un
+    classement) : le rerun suivant la trouve en cache. Les erreurs sont ignorées.
+    """
+    _PREFETCH.submit(fn, *args, **kwargs)
+
+
+def cache_stats() -> dict[str, int]:
+    return _CACHE.stats()
@@ -1,9 +1,15 @@
 # infra/db.py
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import os
-from collections.abc import Iterator
+import threading
+import time
+from collections.abc import Coroutine, Iterator
 from contextlib import contextmanager
+from typing import Any, TypeVar
+from urllib.parse import urlparse
 
 # Streamlit peut ne pas être dispo en contexte tests -> importer prudemment
 try:
@@ -12,12 +18,44 @@ except Exception:  # pragma: no cover
     st = None  # type: ignore
 
 from sqlalchemy import create_engine, text
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, Row, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import Executable
+
+T = TypeVar("T")
 
 _ENGINE: Engine | None = None
 _SESSION_FACTORY: sessionmaker | None = None
-_BOOTSTRAPPED: bool = False
+_READ_ENGINE: Engine | None = None
+_READ_SESSION_FACTORY: sessionmaker | None = None
+# True si le read-only n'a pas pu être posé à la connexion (pooler) : SET par transaction
+_READ_ONLY_PER_TRANSACTION: bool = False
+_ASYNC_ENGINE: AsyncEngine | None = None
+_ASYNC_READ_ONLY_PER_TRANSACTION: bool = False
+_LOOP: asyncio.AbstractEventLoop | None = None
+_LOOP_LOCK = threading.Lock()
+_READ_SLOTS: asyncio.Semaphore | None = None  # lectures fetch_all simultanées
+# Création paresseuse des engines : premières lectures concurrentes (asyncio.to_thread)
+_ENGINE_LOCK = threading.RLock()
+
+# Driver asyncio équivalent au driver synchrone de l'URL
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+# Paramètres libpq de l'URL (psycopg2) sans mot-clé asyncpg : le dialecte asyncpg passe la
+# query string telle quelle à asyncpg.connect(), qui refuserait une clé inconnue
+_LIBPQ_ONLY_PARAMS = (
+    "channel_binding",
+    "gssencmode",
+    "keepalives",
+    "keepalives_count",
+    "keepalives_idle",
+    "keepalives_interval",
+    "options",
+    "sslcompression",
+    "target_session_attrs",
+)
 
 
 def _db_url() -> str:
@@ -31,34 +69,366 @@ def _db_url() -> str:
     return url or os.getenv("DATABASE_URL", "")
 
 
-def get_engine() -> Engine:
+def db_setting(name: str, default: str | None = None) -> str | None:
+    # 1) st.secrets['database'][name]  2) fallback os.getenv('DB_<NAME>')
+    value = None
+    try:
+        if st is not None:
+            value = st.secrets.get("database", {}).get(name)  # type: ignore
+    except Exception:
+        pass
+    if value is None:
+        value = os.getenv(f"DB_{name.upper()}")
+    return str(value) if value is not None else default
+
+
+def _int_setting(name: str, default: int) -> int:
+    value = db_setting(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _bool_setting(name: str, default: bool) -> bool:
+    value = db_setting(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_pooled(url: str | None = None) -> bool:
+    """
+    Connexion via un pooler externe en mode transaction (PgBouncer / pooler Neon) ?
+    database.pooler = 'auto' (défaut : hôte Neon '-pooler'), 'pgbouncer' ou 'none'.
+    """
+    mode = (db_setting("pooler", "auto") or "auto").lower()
+    if mode == "auto":
+        host = urlparse(url if url is not None else _db_url()).hostname or ""
+        return "-pooler" in host
+    return mode in ("pgbouncer", "transaction", "true", "1")
+
+
+def pool_options(url: str) -> dict:
+    """
+    Réglages du pool (st.secrets['database'][...] ou DB_POOL_SIZE, DB_MAX_OVERFLOW, ...).
+    Derrière un pooler, les connexions serveur sont mutualisées : défauts plus larges.
+    """
+    pooled = is_pooled(url)
+    return {
+        "pool_size": _int_setting("pool_size", 10 if pooled else 5),
+        "max_overflow": _int_setting("max_overflow", 10 if pooled else 0),
+        "pool_timeout": _int_setting("pool_timeout", 30),
+        "pool_recycle": _int_setting("pool_recycle", 1800),
+        "pool_pre_ping": _bool_setting("pool_pre_ping", True),
+    }
+
+
+class _PoolMetrics:
+    """Compteurs du pool : attentes au checkout et épuisements (pool + overflow pleins)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.saturated = 0  # checkouts arrivés pool plein : ont dû attendre une connexion
+        self.exhausted = 0  # attentes terminées en timeout
+
+    def record(self, waited: float, saturated: bool, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.exhausted += 1
+                return
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            self.saturated += int(saturated)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "wait_avg_ms": self.wait_total / self.checkouts * 1000 if self.checkouts else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+                "saturated": self.saturated,
+                "exhausted": self.exhausted,
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = _PoolMetrics()
+
+    def _do_get(self):
+        saturated = self.checkedout() >= self.size() + max(self._max_overflow, 0)
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - start, saturated, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, saturated)
+        return conn
+
+
+def pool_metrics(engine: Engine | None = None) -> dict:
+    """État courant du pool (engine principal par défaut) + compteurs cumulés depuis sa création."""
+    engine = engine or _ENGINE
+    pool = engine.pool if engine is not None else None
+    if not isinstance(pool, InstrumentedQueuePool):
+        return {}
+    metrics = pool.metrics.snapshot()
+    metrics.update(
+        {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "pooler": is_pooled(engine.url.render_as_string(hide_password=False)),
+        }
+    )
+    return metrics
+
+
+def _instrument(engine: Engine, role: str) -> None:
+    from infra import sqltrace
+
+    if sqltrace.enabled():
+        sqltrace.install(engine, role)
+
+
+def get_engine(check_schema: bool = True) -> Engine:
+    """
+    Engine global. À la première création, une seule requête vérifie la version du schéma
+    (voir infra.migrations) ; check_schema=False pour la commande de migration elle-même.
+    """
     global _ENGINE, _SESSION_FACTORY
-    if _ENGINE is None:
+    if _ENGINE is not None:
+        return _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is not None:
+            return _ENGINE
         url = _db_url()
         if not url:
             raise RuntimeError(
                 "DATABASE_URL manquant (st.secrets['database']['url'] ou variable d'environnement)."
             )
-        _ENGINE = create_engine(
+        engine = create_engine(
             url,
-            pool_size=5,
-            max_overflow=0,
-            pool_pre_ping=True,
-            pool_recycle=1800,
+            poolclass=InstrumentedQueuePool,
             future=True,
+            **pool_options(url),
         )
-        _SESSION_FACTORY = sessionmaker(bind=_ENGINE, expire_on_commit=False, future=True)
+        _instrument(engine, "write")
+        if check_schema:
+            from infra.migrations import ensure_schema
+
+            ensure_schema(engine)
+        # Fabrique avant l'engine : get_session la teste sans prendre le verrou
+        _SESSION_FACTORY = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+        _ENGINE = engine
     return _ENGINE
 
 
+def get_read_engine() -> Engine:
+    """
+    Engine des sessions read-only : réplique si database.read_url / DB_READ_URL est défini,
+    sinon la base principale via un pool dédié. Le read-only est posé à la connexion
+    (default_transaction_read_only) : aucun aller-retour supplémentaire par session.
+    Derrière un pooler en mode transaction, les options de démarrage ne sont pas transmises :
+    repli sur SET TRANSACTION READ ONLY à chaque session.
+    """
+    global _READ_ENGINE, _READ_SESSION_FACTORY, _READ_ONLY_PER_TRANSACTION
+    if _READ_ENGINE is not None:
+        return _READ_ENGINE
+    with _ENGINE_LOCK:
+        if _READ_ENGINE is not None:
+            return _READ_ENGINE
+        primary = get_engine()
+        url = db_setting("read_url") or primary.url.render_as_string(hide_password=False)
+        connect_args = {}
+        is_postgres = make_url(url).get_backend_name() == "postgresql"
+        if is_postgres and not is_pooled(url):
+            connect_args["options"] = "-c default_transaction_read_only=on"
+        _READ_ONLY_PER_TRANSACTION = is_postgres and not connect_args
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            connect_args=connect_args,
+            future=True,
+            **pool_options(url),
+        )
+        _instrument(engine, "read")
+        _READ_SESSION_FACTORY = sessionmaker(bind=engine, expire_on_commit=False, future=True)
+        _READ_ENGINE = engine
+    return _READ_ENGINE
+
+
+# ---------- Engine asyncio (lectures concurrentes, optionnel) ----------
+def async_enabled() -> bool:
+    """Lectures groupées via l'engine asyncio (database.async_reads / DB_ASYNC_READS)."""
+    return _bool_setting("async_reads", False)
+
+
+def async_url(url: str) -> str:
+    """
+    URL synchrone -> même base via le driver asyncio (postgresql+asyncpg, sqlite+aiosqlite).
+    Postgres : paramètres libpq retirés de l'URL (cf. async_connect_args pour sslmode,
+    connect_timeout, application_name).
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise RuntimeError(f"Pas de driver asyncio connu pour '{backend}'.")
+    parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    if backend == "postgresql":
+        parsed = parsed.difference_update_query(
+            (*_LIBPQ_ONLY_PARAMS, "sslmode", "connect_timeout", "application_name")
+        )
+        if is_pooled(url):
+            # Pooler en mode transaction : pas de requêtes préparées gardées d'une transaction
+            # à l'autre (elles vivent sur une connexion serveur qui change)
+            parsed = parsed.update_query_dict({"prepared_statement_cache_size": "0"})
+    return parsed.render_as_string(hide_password=False)
+
+
+def async_connect_args(url: str) -> dict[str, Any]:
+    """
+    Équivalents asyncpg des paramètres libpq de l'URL : sslmode -> ssl (mêmes valeurs :
+    'require', 'verify-full', ...), connect_timeout -> timeout, application_name ->
+    server_settings.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return {}
+    query = parsed.query
+    args: dict[str, Any] = {}
+    if "sslmode" in query:
+        args["ssl"] = query["sslmode"]
+    if "connect_timeout" in query:
+        args["timeout"] = float(query["connect_timeout"])
+    if "application_name" in query:
+        args["server_settings"] = {"application_name": query["application_name"]}
+    return args
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Engine asyncio des lectures, même cible que get_read_engine (réplique si configurée) et
+    mêmes réglages de pool. Ses connexions appartiennent à la boucle de run_async : ne
+    l'utiliser que dans des coroutines exécutées par run_async.
+    """
+    global _ASYNC_ENGINE, _ASYNC_READ_ONLY_PER_TRANSACTION
+    if _ASYNC_ENGINE is not None:
+        return _ASYNC_ENGINE
+    with _ENGINE_LOCK:
+        if _ASYNC_ENGINE is not None:
+            return _ASYNC_ENGINE
+        primary = get_engine()  # vérification du schéma, une fois
+        url = db_setting("read_url") or primary.url.render_as_string(hide_password=False)
+        connect_args = async_connect_args(url)
+        if make_url(url).get_backend_name() == "postgresql":
+            if is_pooled(url):
+                connect_args["statement_cache_size"] = 0
+                _ASYNC_READ_ONLY_PER_TRANSACTION = True
+            else:
+                server_settings = connect_args.setdefault("server_settings", {})
+                server_settings["default_transaction_read_only"] = "on"
+        engine = create_async_engine(async_url(url), connect_args=connect_args, **pool_options(url))
+        # Les événements d'exécution sont émis par l'engine synchrone sous-jacent
+        _instrument(engine.sync_engine, "async")
+        _ASYNC_ENGINE = engine
+    return _ASYNC_ENGINE
+
+
+def _event_loop() -> asyncio.AbstractEventLoop:
+    # Boucle unique du processus, dans un thread démon : les threads de script Streamlit
+    # (synchrones) lui soumettent leurs coroutines, le pool asyncio lui reste attaché
+    global _LOOP
+    with _LOOP_LOCK:
+        if _LOOP is None:
+            _LOOP = asyncio.new_event_loop()
+            threading.Thread(target=_LOOP.run_forever, name="db-async", daemon=True).start()
+    return _LOOP
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Façade synchrone : exécute la coroutine sur la boucle de l'engine asyncio et attend.
+    La coroutine voit le contexte (contextvars) de l'appelant, dont la trace SQL du rerun.
+    """
+    context = contextvars.copy_context()
+    return asyncio.run_coroutine_threadsafe(_in_context(coro, context), _event_loop()).result()
+
+
+async def _in_context(coro: Coroutine[Any, Any, T], context: contextvars.Context) -> T:
+    # Une tâche prend le contexte du thread de la boucle : on lui passe celui de l'appelant
+    return await asyncio.get_running_loop().create_task(coro, context=context)
+
+
+def _read_slots() -> asyncio.Semaphore:
+    # Créé sur la boucle de run_async (seule à exécuter fetch_all), dimensionné sur le pool
+    # de lecture : au-delà, une lecture attend dans la boucle plutôt qu'au checkout
+    global _READ_SLOTS
+    if _READ_SLOTS is None:
+        url = db_setting("read_url") or get_engine().url.render_as_string(hide_password=False)
+        options = pool_options(url)
+        _READ_SLOTS = asyncio.Semaphore(max(1, options["pool_size"] + options["max_overflow"]))
+    return _READ_SLOTS
+
+
+async def fetch_all(statement: Executable, params: dict | None = None) -> list[Row]:
+    """
+    Lecture (read-only) de toutes les lignes, pour les variantes *_async des lectures.
+    Engine asyncio si async_enabled(), sinon session read-only synchrone dans un thread :
+    les lectures lancées ensemble (asyncio.gather) restent concurrentes dans les deux cas,
+    au plus pool_size + max_overflow à la fois (une rafale ne sature pas le pool).
+    """
+    async with _read_slots():
+        if not async_enabled():
+            return await asyncio.to_thread(_fetch_all_sync, statement, params)
+        async with get_async_engine().connect() as conn:
+            if _ASYNC_READ_ONLY_PER_TRANSACTION:
+                await conn.execute(text("SET TRANSACTION READ ONLY"))
+            return list((await conn.execute(statement, params)).all())
+
+
+def _fetch_all_sync(statement: Executable, params: dict | None) -> list[Row]:
+    with get_session(readonly=True) as s:
+        return list(s.execute(statement, params).all())
+
+
+def reset_engines() -> None:
+    """Ferme les pools et oublie les engines (changement d'URL : bench, tests)."""
+    global _ENGINE, _SESSION_FACTORY, _READ_ENGINE, _READ_SESSION_FACTORY, _ASYNC_ENGINE
+    global _READ_ONLY_PER_TRANSACTION, _ASYNC_READ_ONLY_PER_TRANSACTION, _READ_SLOTS
+    for engine in (_ENGINE, _READ_ENGINE):
+        if engine is not None:
+            engine.dispose()
+    if _ASYNC_ENGINE is not None:
+        run_async(_ASYNC_ENGINE.dispose())
+    _ENGINE = _SESSION_FACTORY = _READ_ENGINE = _READ_SESSION_FACTORY = _ASYNC_ENGINE = None
+    # Propres à l'URL des engines oubliés (pooler ou non) : recalculés à la création
+    _READ_ONLY_PER_TRANSACTION = _ASYNC_READ_ONLY_PER_TRANSACTION = False
+    _READ_SLOTS = None
+
+
 @contextmanager
 def get_session(readonly: bool = False) -> Iterator[Session]:
-    if _SESSION_FACTORY is None:
-        get_engine()
-    assert _SESSION_FACTORY is not None
-    session = _SESSION_FACTORY()
+    if readonly:
+        if _READ_SESSION_FACTORY is None:
+            get_read_engine()
+        factory = _READ_SESSION_FACTORY
+    else:
+        if _SESSION_FACTORY is None:
+            get_engine()
+        factory = _SESSION_FACTORY
+    assert factory is not None
+    session = factory()
     try:
-        if readonly:
+        if readonly and _READ_ONLY_PER_TRANSACTION:
             session.execute(text("SET TRANSACTION READ ONLY"))
         yield session
         if not readonly:
@@ -68,33 +438,3 @@ def get_session(readonly: bool = False) -> Iterator[Session]:
         raise
     finally:
         session.close()
-
-
-def bootstrap_after_create() -> None:
-    """
-    Idempotent : insère les WODs 26.x + crée les index si absents.
-    Appelée après Base.metadata.create_all(...).
-    """
-    global _BOOTSTRAPPED
-    if _BOOTSTRAPPED:
-        return
-    engine = get_engine()
-    with engine.begin() as conn:
-        # Seed 'wods' (ON CONFLICT pour idempotence)
-        conn.execute(
-            text("""
-            INSERT INTO wods (wod, label, type, timecap_seconds)
-            VALUES 
-              ('26.1', 'Open 26.1', 'reps', NULL),
-              ('26.2', 'Open 26.2', 'time', 12*60),
-              ('26.3', 'Open 26.3', 'time', 20*60)
-            ON CONFLICT (wod) DO NOTHING;
-        """)
-        )
-
-        # Index idempotents
-        conn.execute(
-            text("CREATE INDEX IF NOT EXISTS idx_scores_user_wod ON scores(user_id, wod);")
-        )
-        conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_sex_level ON users(sex, level);"))
-    _BOOTSTRAPPED = True
@@ -0,0 +1,154 @@
+# infra/export.py
+"""
+Export du classement (table 'leaderboard') en CSV ou Parquet, en streaming :
+curseur serveur (yield_per) + écriture par blocs => mémoire bornée quel que soit le volume.
+
+CLI : python -m infra.export --format parquet --out resultats.parquet [--wod 26.1] [--sex Male]
+                             [--season 2026] [--box ma-box]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+from collections.abc import Iterator
+from typing import IO
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+from infra.db import get_session
+
+CHUNK_SIZE = 5000
+FORMATS = ("csv", "parquet")
+
+EXPORT_COLUMNS = ["season", "box", "wod", "sex", "level", "place", "points", "name", "score"]
+_EXPORT_SCHEMA = pa.schema(
+    [
+        ("season", pa.int32()),
+        ("box", pa.string()),
+        ("wod", pa.string()),
+        ("sex", pa.string()),
+        ("level", pa.string()),
+        ("place", pa.int32()),
+        ("points", pa.int64()),
+        ("name", pa.string()),
+        ("score", pa.string()),
+    ]
+)
+
+_EXPORT_SQL = text("""
+    SELECT l.season, l.box, l.wod, l.sex, l.level, l.place, l.points, u.name, l.score
+    FROM leaderboard l
+    JOIN users u ON u.id = l.user_id
+    WHERE (:season IS NULL OR l.season = :season)
+      AND (:box IS NULL OR l.box = :box)
+      AND (:wod IS NULL OR l.wod = :wod)
+      AND (:sex IS NULL OR l.sex = :sex)
+      AND (:level IS NULL OR l.level = :level)
+    ORDER BY l.season, l.box, l.wod, l.sex, l.level, l.place, u.name
+""")
+
+
+def iter_leaderboard_chunks(
+    wod: str | None = None,
+    sex: str | None = None,
+    level: str | None = None,
+    season: int | None = None,
+    box: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_rows: int | None = None,
+) -> Iterator[list[tuple]]:
+    """
+    Blocs de lignes (EXPORT_COLUMNS) ; filtre None = toutes les valeurs ('Overall' inclus).
+    Avec max_rows, la lecture s'arrête après max_rows lignes.
+    """
+    remaining = max_rows
+    with get_session(readonly=True) as s:
+        result = s.execute(
+            _EXPORT_SQL.execution_options(yield_per=chunk_size),
+            {"wod": wod, "sex": sex, "level": level, "season": season, "box": box},
+        )
+        for partition in result.partitions(chunk_size):
+            chunk = [tuple(row) for row in partition]
+            if remaining is not None:
+                chunk = chunk[:remaining]
+                remaining -= len(chunk)
+            if chunk:
+                yield chunk
+            if remaining == 0:
+                break
+
+
+def write_csv(out: IO[str], chunks: Iterator[list[tuple]]) -> int:
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for chunk in chunks:
+        writer.writerows(chunk)
+        count += len(chunk)
+    return count
+
+
+def write_parquet(out: str | IO[bytes], chunks: Iterator[list[tuple]]) -> int:
+    count = 0
+    with pq.ParquetWriter(out, _EXPORT_SCHEMA, compression="zstd") as writer:
+        for chunk in chunks:
+            columns = list(zip(*chunk, strict=True))
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=_EXPORT_SCHEMA))
+            count += len(chunk)
+    return count
+
+
+def export_leaderboard(
+    path: str,
+    fmt: str,
+    wod: str | None = None,
+    sex: str | None = None,
+    level: str | None = None,
+    season: int | None = None,
+    box: str | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_rows: int | None = None,
+) -> int:
+    """
+    Écrit le classement filtré dans `path` (au plus max_rows lignes) ; renvoie le nombre de
+    lignes exportées.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt} (attendu : {', '.join(FORMATS)})")
+    chunks = iter_leaderboard_chunks(wod, sex, level, season, box, chunk_size, max_rows)
+    if fmt == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            return write_csv(f, chunks)
+    return write_parquet(path, chunks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export du classement (CSV / Parquet).")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--wod", help="'26.1', ... ou 'Overall' (défaut : tous)")
+    parser.add_argument("--sex")
+    parser.add_argument("--level")
+    parser.add_argument("--season", type=int)
+    parser.add_argument("--box")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    count = export_leaderboard(
+        args.out,
+        args.format,
+        args.wod,
+        args.sex,
+        args.level,
+        args.season,
+        args.box,
+        chunk_size=args.chunk_size,
+    )
+    print(f"{count} lignes exportées -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# infra/images.py
+"""
+Images de l'application : variantes redimensionnées (WebP, AVIF si Pillow le permet) à
+quelques largeurs, noms contenant un hash du contenu, servies comme fichiers statiques.
+
+Streamlit sert static/ sous app/static/ (server.enableStaticServing, .streamlit/config.toml).
+responsive_image insère un <picture> : le navigateur choisit le format (AVIF, sinon WebP)
+et la largeur (srcset / sizes) ; avec ?v=<hash>, Tornado envoie un Cache-Control de 10 ans :
+une image déjà vue n'est plus retéléchargée. Repli sur st.image(source) tant que
+les variantes ne sont pas construites.
+
+Build (à relancer quand une image source change ; sortie versionnée dans static/) :
+    python -m infra.images [--force]
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import html
+import io
+import json
+from pathlib import Path
+
+from PIL import Image, features
+
+ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = ROOT / "static"
+STATIC_URL = "app/static"  # URL relative de static/ (service statique de Streamlit)
+MANIFEST = STATIC_DIR / "manifest.json"
+SOURCES = ("crossfit-open-2026.png",)
+WIDTHS = (480, 960, 1440)
+# Largeur affichée par défaut : colonne centrale d'une mise en page 'wide' à 3 colonnes,
+# pleine largeur quand les colonnes s'empilent (mobile)
+DEFAULT_SIZES = "(max-width: 640px) 100vw, 33vw"
+# Réglages d'encodage par format (qualité visuelle proche, AVIF ~20-30 % plus léger)
+ENCODERS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 6},
+    "avif": {"format": "AVIF", "quality": 60, "speed": 4},
+}
+MIME_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def available_formats() -> list[str]:
+    """WebP toujours ; AVIF si le Pillow installé sait l'encoder (plugin natif, Pillow >= 11.2)."""
+    return [fmt for fmt in ENCODERS if features.check(fmt)]
+
+
+def _encode(image: Image.Image, width: int, fmt: str) -> tuple[bytes, int]:
+    height = round(image.height * width / image.width)
+    resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    resized.save(buffer, **ENCODERS[fmt])
+    return buffer.getvalue(), height
+
+
+def build_variants(source: str, force: bool = False, manifest: dict | None = None) -> dict:
+    """
+    Variantes d'une image source (chemin relatif à la racine du dépôt) dans static/ :
+    '<nom>-<largeur>.<hash>.<format>'. Rien n'est régénéré si le contenu de la source et
+    les formats n'ont pas changé ; les anciennes variantes de la source sont supprimées.
+    Renvoie l'entrée du manifeste.
+    """
+    path = ROOT / source
+    data = path.read_bytes()
+    source_sha = hashlib.sha256(data).hexdigest()
+    formats = available_formats()
+    image = Image.open(io.BytesIO(data))
+    # Largeurs plus petites que la source (à plus de 10 % près), plus la pleine largeur plafonnée
+    widths = sorted({w for w in WIDTHS if w < 0.9 * image.width} | {min(max(WIDTHS), image.width)})
+    previous = (manifest or {}).get(source)
+    if (
+        not force
+        and previous
+        and previous["sha256"] == source_sha
+        and {(v["format"], v["width"]) for v in previous["variants"]}
+        == {(fmt, w) for fmt in formats for w in widths}
+        and all((STATIC_DIR / v["file"]).exists() for v in previous["variants"])
+    ):
+        return previous
+
+    STATIC_DIR.mkdir(exist_ok=True)
+    image.load()
+    variants = []
+    for fmt in formats:
+        for width in widths:
+            encoded, height = _encode(image, width, fmt)
+            digest = hashlib.sha256(encoded).hexdigest()[:10]
+            name = f"{path.stem}-{width}.{digest}.{fmt}"
+            (STATIC_DIR / name).write_bytes(encoded)
+            variants.append(
+                {
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "file": name,
+                    "bytes": len(encoded),
+                }
+            )
+
+    keep = {v["file"] for v in variants}
+    for old in STATIC_DIR.glob(f"{path.stem}-*.*"):
+        if old.name not in keep:
+            old.unlink()
+    return {
+        "sha256": source_sha,
+        "width": image.width,
+        "height": image.height,
+        "bytes": len(data),
+        "variants": variants,
+    }
+
+
+def build(force: bool = False) -> dict:
+    manifest = json.loads(MANIFEST.read_text()) if MANIFEST.exists() else {}
+    manifest = {source: build_variants(source, force, manifest) for source in SOURCES}
+    MANIFEST.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    _manifest.cache_clear()
+    return manifest
+
+
+@functools.cache
+def _manifest() -> dict:
+    return json.loads(MANIFEST.read_text()) if MANIFEST.exists() else {}
+
+
+def _url(variant: dict) -> str:
+    # Nom haché = contenu immuable ; ?v= active le Cache-Control longue durée de Tornado
+    digest = variant["file"].rsplit(".", 2)[1]
+    return f"{STATIC_URL}/{variant['file']}?v={digest}"
+
+
+def _srcset(variants: list[dict]) -> str:
+    return ", ".join(f"{_url(v)} {v['width']}w" for v in variants)
+
+
+def pick_variant(source: str, width: int, fmt: str = "webp") -> dict | None:
+    """Plus petite variante d'au moins `width` pixels au format `fmt` (la plus large à défaut)."""
+    variants = [v for v in _manifest().get(source, {}).get("variants", []) if v["format"] == fmt]
+    if not variants:
+        return None
+    wide_enough = [v for v in variants if v["width"] >= width]
+    if wide_enough:
+        return min(wide_enough, key=lambda v: v["width"])
+    return max(variants, key=lambda v: v["width"])
+
+
+def picture_html(source: str, width: int = 960, alt: str = "", sizes: str = DEFAULT_SIZES) -> str:
+    """
+    <picture> de `source` : une <source> par format (AVIF d'abord) avec toutes ses largeurs,
+    et un <img> WebP de `width` pixels pour les navigateurs sans srcset. Chaîne vide si
+    les variantes ne sont pas construites.
+    """
+    fallback = pick_variant(source, width)
+    if fallback is None:
+        return ""
+    variants = _manifest()[source]["variants"]
+    sources = []
+    for fmt in ("avif", "webp"):
+        of_format = sorted((v for v in variants if v["format"] == fmt), key=lambda v: v["width"])
+        if of_format:
+            sources.append(
+                f'<source type="{MIME_TYPES[fmt]}" srcset="{_srcset(of_format)}" sizes="{sizes}">'
+            )
+    return (
+        f"<picture>{''.join(sources)}"
+        f'<img src="{_url(fallback)}" alt="{html.escape(alt)}" '
+        f'width="{fallback["width"]}" height="{fallback["height"]}" '
+        'style="width: 100%; height: auto;"></picture>'
+    )
+
+
+def responsive_image(
+    source: str, width: int = 960, alt: str = "", sizes: str = DEFAULT_SIZES
+) -> None:
+    """
+    Affiche `source` à la largeur de la colonne via ses variantes statiques : le navigateur
+    choisit format et largeur selon `sizes` (largeur affichée) et la densité de l'écran.
+    """
+    import streamlit as st
+
+    picture = picture_html(source, width, alt, sizes)
+    if not picture:
+        st.image(source)
+        return
+    st.markdown(picture, unsafe_allow_html=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Variantes WebP / AVIF des images.")
+    parser.add_argument("--force", action="store_true", help="régénère toutes les variantes")
+    args = parser.parse_args()
+
+    print(f"formats : {', '.join(available_formats())}")
+    for source, entry in build(args.force).items():
+        print(f"{source} ({entry['width']}x{entry['height']}, {entry['bytes'] // 1024} Ko)")
+        for v in entry["variants"]:
+            print(f"  {v['file']:<48} {v['bytes'] // 1024:>5} Ko")
+
+
+if __name__ == "__main__":
+    main()
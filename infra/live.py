@@ -0,0 +1,165 @@
+# infra/live.py
+"""
+Mises à jour en direct du classement (Postgres LISTEN / NOTIFY).
+
+Chaque écriture de score émet, dans sa transaction, un NOTIFY sur CHANNEL portant la
+division touchée {wod, sex, level, box} : Postgres ne le délivre qu'au commit. Un seul
+thread d'écoute par processus incrémente un compteur en mémoire par division ; les
+sessions Classement comparent ces compteurs (sans requête) à ceux de leur dernier
+affichage et ne relisent que si leur division a changé.
+
+LISTEN exige une connexion directe (le pooler Neon / PgBouncer en mode transaction ne
+relaie pas les notifications) : database.listen_url, sinon l'URL principale sans
+'-pooler'. Hors Postgres (SQLite local), la notification est délivrée au processus
+courant au commit. Désactivable : database.live_updates = false / DB_LIVE_UPDATES=0.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import select
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from infra.db import db_setting, get_engine, is_pooled
+
+CHANNEL = "score_updates"
+IDLE_CHECK_SECONDS = 60.0  # sans notification : SELECT 1 pour détecter une connexion morte
+RECONNECT_SECONDS = 5.0
+
+Division = tuple[str, str, str, str]  # (wod, sex, level, box)
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+log = logging.getLogger(__name__)
+
+
+def enabled() -> bool:
+    return (db_setting("live_updates") or "true").lower() in ("1", "true", "yes", "on")
+
+
+class _Hub:
+    """Compteurs par division, plus une époque incrémentée à chaque (re)connexion."""
+
+    def __init__(self):
+        self.epoch = 0
+        self.counts: Counter[Division] = Counter()
+        self._lock = threading.Lock()
+
+    def publish(self, division: Division) -> None:
+        with self._lock:
+            self.counts[division] += 1
+
+    def publish_all(self) -> None:
+        # Notifications perdues pendant une coupure : toutes les divisions sont à relire
+        with self._lock:
+            self.epoch += 1
+
+    def versions(self, divisions: Iterable[Division]) -> tuple[int, ...]:
+        with self._lock:
+            return (self.epoch, *(self.counts[d] for d in divisions))
+
+
+_HUB = _Hub()
+_LISTENER: threading.Thread | None = None
+_LISTENER_LOCK = threading.Lock()
+
+
+def division_versions(divisions: Iterable[Division]) -> tuple[int, ...]:
+    """
+    Version locale (en mémoire, sans requête) des divisions affichées : elle change dès
+    qu'un score y est enregistré, dans ce processus ou un autre. Démarre l'écoute au
+    premier appel.
+    """
+    ensure_listener()
+    return _HUB.versions(divisions)
+
+
+def notify_division(conn: Session | Connection, wod: str, sex: str, level: str, box: str) -> None:
+    """À appeler dans la transaction qui écrit le score : délivré aux écouteurs au commit."""
+    if not enabled():
+        return
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    if bind.dialect.name == "postgresql":
+        payload = json.dumps({"wod": wod, "sex": sex, "level": level, "box": box})
+        conn.execute(_NOTIFY_SQL, {"channel": CHANNEL, "payload": payload})
+    else:
+        _after_commit(conn, lambda: _HUB.publish((wod, sex, level, box)))
+
+
+def _after_commit(conn: Session | Connection, callback: Callable[[], None]) -> None:
+    if isinstance(conn, Session):
+        event.listen(conn, "after_commit", lambda session: callback(), once=True)
+    else:
+        event.listen(conn, "commit", lambda connection: callback(), once=True)
+
+
+def listen_url() -> str:
+    """URL directe pour LISTEN (database.listen_url, sinon principale sans '-pooler')."""
+    url = db_setting("listen_url") or get_engine().url.render_as_string(hide_password=False)
+    if is_pooled(url):
+        parsed = make_url(url)
+        url = parsed.set(host=(parsed.host or "").replace("-pooler", "")).render_as_string(
+            hide_password=False
+        )
+    return url
+
+
+def ensure_listener() -> None:
+    """Démarre le thread d'écoute du processus (Postgres uniquement), une seule fois."""
+    global _LISTENER
+    if _LISTENER is not None or not enabled():
+        return
+    with _LISTENER_LOCK:
+        if _LISTENER is None and get_engine().dialect.name == "postgresql":
+            _LISTENER = threading.Thread(target=_listen_forever, name="db-listen", daemon=True)
+            _LISTENER.start()
+
+
+def _listen_forever() -> None:
+    while True:
+        try:
+            _listen()
+        except Exception:
+            log.exception(
+                "LISTEN %s interrompu, reconnexion dans %.0f s", CHANNEL, RECONNECT_SECONDS
+            )
+        time.sleep(RECONNECT_SECONDS)
+
+
+def _listen() -> None:
+    engine = create_engine(listen_url(), poolclass=NullPool)
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection  # psycopg2
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANNEL}")
+        _HUB.publish_all()
+        while True:
+            if not select.select([conn], [], [], IDLE_CHECK_SECONDS)[0]:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                continue
+            conn.poll()
+            while conn.notifies:
+                _deliver(conn.notifies.pop(0).payload)
+    finally:
+        raw.close()
+        engine.dispose()
+
+
+def _deliver(payload: str) -> None:
+    try:
+        d = json.loads(payload)
+        _HUB.publish((d["wod"], d["sex"], d["level"], d["box"]))
+    except (ValueError, KeyError, TypeError):
+        log.warning("Notification %s illisible : %r", CHANNEL, payload)
@@ -0,0 +1,403 @@
+# infra/migrations.py
+"""
+Migrations versionnées du schéma (remplace le create_all + bootstrap exécutés à l'import).
+
+Chaque migration est idempotente et appliquée une seule fois ; la version appliquée est
+enregistrée dans 'schema_version'. Au démarrage, l'app ne fait qu'une lecture de version.
+
+CLI : python -m infra.migrations          applique les migrations en attente
+      python -m infra.migrations --check  affiche la version du schéma
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+from collections.abc import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from infra.db import db_setting, get_engine
+from infra.models import (
+    DEFAULT_BOX,
+    Base,
+    DataVersion,
+    Leaderboard,
+    Score,
+    ScoreSketch,
+    User,
+)
+from infra.scoring import parse_scores
+
+_SCHEMA_VERSION_DDL = text("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+""")
+
+
+def _before_v11(conn: Connection) -> bool:
+    # Base créée avant les saisons : les reconstructions (code courant) attendent v11
+    return "season" not in {c["name"] for c in inspect(conn).get_columns("scores")}
+
+
+def _v1_initial(conn: Connection) -> None:
+    Base.metadata.create_all(conn, tables=[User.__table__, Score.__table__])
+    # 'wods' dans sa forme v1 : 'season' et 'box' sont ajoutées (et remplies) par v11
+    conn.execute(
+        text("""
+        CREATE TABLE IF NOT EXISTS wods (
+            wod VARCHAR(10) PRIMARY KEY,
+            label VARCHAR(100) NOT NULL,
+            type VARCHAR(10) NOT NULL,
+            timecap_seconds INTEGER
+        )
+    """)
+    )
+    # Seed 'wods' (ON CONFLICT pour idempotence)
+    conn.execute(
+        text("""
+        INSERT INTO wods (wod, label, type, timecap_seconds)
+        VALUES
+          ('26.1', 'Open 26.1', 'reps', NULL),
+          ('26.2', 'Open 26.2', 'time', 12*60),
+          ('26.3', 'Open 26.3', 'time', 20*60)
+        ON CONFLICT (wod) DO NOTHING;
+    """)
+    )
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_scores_user_wod ON scores(user_id, wod);"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS idx_users_sex_level ON users(sex, level);"))
+
+
+def _v2_score_value(conn: Connection) -> None:
+    if conn.dialect.name != "postgresql":
+        _v2_score_value_portable(conn)
+        return
+    # Colonne score_value (tables créées avant son ajout) + backfill des lignes existantes
+    conn.execute(text("ALTER TABLE scores ADD COLUMN IF NOT EXISTS score_value INTEGER;"))
+    conn.execute(
+        text(r"""
+        UPDATE scores s
+        SET score_value = CASE
+          WHEN w.type = 'time' AND upper(trim(s.score)) ~ '^CAP:\d{1,3}$'
+            THEN COALESCE(w.timecap_seconds, 0) + split_part(trim(s.score), ':', 2)::int
+          WHEN w.type = 'time' AND trim(s.score) ~ '^\d+:\d+$'
+            THEN split_part(trim(s.score), ':', 1)::int * 60
+               + split_part(trim(s.score), ':', 2)::int
+          WHEN w.type = 'time' AND trim(s.score) ~ '^\d+:\d+:\d+$'
+            THEN split_part(trim(s.score), ':', 1)::int * 3600
+               + split_part(trim(s.score), ':', 2)::int * 60
+               + split_part(trim(s.score), ':', 3)::int
+          WHEN w.type <> 'time' AND trim(s.score) ~ '^\d+$'
+            THEN trim(s.score)::int
+        END
+        FROM wods w
+        WHERE w.wod = s.wod AND s.score_value IS NULL;
+    """)
+    )
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS idx_scores_wod_value ON scores(wod, score_value);")
+    )
+
+
+def _v2_score_value_portable(conn: Connection) -> None:
+    # Bases locales sans regex SQL (SQLite : bench, tests) : backfill via infra.scoring
+    if "score_value" not in {c["name"] for c in inspect(conn).get_columns("scores")}:
+        conn.execute(text("ALTER TABLE scores ADD COLUMN score_value INTEGER;"))
+    rows = conn.execute(
+        text("""
+        SELECT s.id, s.score, w.type, w.timecap_seconds
+        FROM scores s JOIN wods w ON w.wod = s.wod
+        WHERE s.score_value IS NULL
+    """)
+    ).all()
+    ids, raw, types, caps = zip(*rows, strict=True) if rows else ((), (), (), ())
+    values = parse_scores(list(raw), list(types), list(caps))
+    params = [{"id": i, "v": int(v)} for i, v in zip(ids, values, strict=True) if not math.isnan(v)]
+    if params:
+        conn.execute(text("UPDATE scores SET score_value = :v WHERE id = :id"), params)
+    conn.execute(
+        text("CREATE INDEX IF NOT EXISTS idx_scores_wod_value ON scores(wod, score_value);")
+    )
+
+
+def _v3_leaderboard(conn: Connection) -> None:
+    from infra.ranking import refresh_leaderboard
+
+    Base.metadata.create_all(conn, tables=[Leaderboard.__table__])
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_leaderboard_division_place "
+            "ON leaderboard(sex, level, wod, place);"
+        )
+    )
+    # Classement matérialisé : construit une fois, puis maintenu à chaque écriture de score
+    if not _before_v11(conn):
+        refresh_leaderboard(conn)
+
+
+def _v4_data_version(conn: Connection) -> None:
+    Base.metadata.create_all(conn, tables=[DataVersion.__table__])
+    conn.execute(
+        text("INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;")
+    )
+
+
+def _v5_leaderboard_user_index(conn: Connection) -> None:
+    # Jointure Overall -> lignes par WOD de l'athlète (leaderboard_overall) : sans index sur
+    # user_id, la jointure parcourt toute la division pour chaque athlète
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_leaderboard_user "
+            "ON leaderboard(user_id, sex, level, wod);"
+        )
+    )
+
+
+def _v6_unique_user_wod(conn: Connection) -> None:
+    from infra.ranking import refresh_leaderboard
+
+    # Doublons (user_id, wod) laissés par les anciennes saisies : on garde le plus récent
+    conn.execute(
+        text("""
+        DELETE FROM scores
+        WHERE id NOT IN (SELECT max(id) FROM scores GROUP BY user_id, wod)
+    """)
+    )
+    conn.execute(
+        text("CREATE UNIQUE INDEX IF NOT EXISTS uq_scores_user_wod ON scores(user_id, wod);")
+    )
+    # L'index unique couvre les recherches (user_id, wod)
+    conn.execute(text("DROP INDEX IF EXISTS idx_scores_user_wod;"))
+    if not _before_v11(conn):
+        refresh_leaderboard(conn)
+
+
+def _v7_score_sketches(conn: Connection) -> None:
+    from infra.sketches import rebuild_sketches
+
+    Base.metadata.create_all(conn, tables=[ScoreSketch.__table__])
+    if not _before_v11(conn):
+        rebuild_sketches(conn)
+
+
+def _v8_leaderboard_keyset_index(conn: Connection) -> None:
+    # Pagination par curseur (place, user_id) : recherche directe dans l'index, sans tri
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_leaderboard_division_keyset "
+            "ON leaderboard(sex, level, wod, place, user_id);"
+        )
+    )
+    conn.execute(text("DROP INDEX IF EXISTS idx_leaderboard_division_place;"))
+
+
+def _v9_overall_missing_wods(conn: Connection) -> None:
+    from infra.ranking import refresh_leaderboard
+
+    # Overall recalculé : un WOD non saisi compte désormais l'effectif du WOD + 1
+    if not _before_v11(conn):
+        refresh_leaderboard(conn)
+
+
+def _v10_wod_catalog_version(conn: Connection) -> None:
+    # Version du catalogue des WODs (infra.wods) : ligne dédiée, indépendante des scores
+    conn.execute(
+        text("INSERT INTO data_version (id, version) VALUES (2, 0) ON CONFLICT (id) DO NOTHING;")
+    )
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> None:
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl};"))
+
+
+def _v11_seasons_and_boxes(conn: Connection) -> None:
+    from infra.ranking import refresh_leaderboard
+    from infra.sketches import rebuild_sketches
+    from infra.wods import season_of_code
+
+    # Dimensions saison / box : athlètes rattachés à une box, WODs à une saison
+    _add_column(conn, "users", "box", f"VARCHAR(50) NOT NULL DEFAULT '{DEFAULT_BOX}'")
+    _add_column(conn, "wods", "season", "INTEGER")
+    _add_column(conn, "wods", "box", "VARCHAR(50)")
+    codes = conn.execute(text("SELECT wod FROM wods WHERE season IS NULL")).scalars().all()
+    if codes:
+        conn.execute(
+            text("UPDATE wods SET season = :season WHERE wod = :wod"),
+            [{"wod": wod, "season": season_of_code(wod)} for wod in codes],
+        )
+
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("ALTER TABLE wods ALTER COLUMN season SET NOT NULL;"))
+        _partition_scores(conn)
+    else:
+        _add_column(conn, "scores", "season", "INTEGER NOT NULL DEFAULT 0")
+        _add_column(conn, "scores", "box", f"VARCHAR(50) NOT NULL DEFAULT '{DEFAULT_BOX}'")
+        conn.execute(
+            text("""
+            UPDATE scores SET
+                season = COALESCE((SELECT season FROM wods WHERE wods.wod = scores.wod), 0),
+                box = (SELECT box FROM users WHERE users.id = scores.user_id)
+        """)
+        )
+        conn.execute(text("DROP INDEX IF EXISTS uq_scores_user_wod;"))
+        conn.execute(
+            text("CREATE UNIQUE INDEX uq_scores_user_wod ON scores(user_id, wod, season);")
+        )
+
+    # Tables dérivées : clé (saison, box, ...) puis reconstruction
+    conn.execute(text("DROP TABLE IF EXISTS leaderboard;"))
+    conn.execute(text("DROP TABLE IF EXISTS score_sketches;"))
+    Base.metadata.create_all(conn, tables=[Leaderboard.__table__, ScoreSketch.__table__])
+    conn.execute(
+        text(
+            "CREATE INDEX idx_leaderboard_user "
+            "ON leaderboard(user_id, season, box, sex, level, wod);"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE INDEX idx_leaderboard_division_keyset "
+            "ON leaderboard(box, sex, level, wod, season, place, user_id);"
+        )
+    )
+    refresh_leaderboard(conn)
+    rebuild_sketches(conn)
+
+
+def _partition_scores(conn: Connection) -> None:
+    """
+    'scores' -> table partitionnée par saison (LIST) : une partition par saison du
+    catalogue + 'scores_default'. Les lectures filtrées sur la saison n'ouvrent que sa
+    partition, quel que soit l'historique. Sans effet si la table est déjà partitionnée.
+    """
+    from infra.scores import ensure_season_partition
+
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = 'scores'::regclass"))
+    if kind.scalar() == "p":
+        return
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('scores', 'id')")).scalar()
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE;"))
+    conn.execute(text("ALTER TABLE scores RENAME TO scores_unpartitioned;"))
+    conn.execute(
+        text(f"""
+        CREATE TABLE scores (
+            id INTEGER NOT NULL DEFAULT nextval('{sequence}'),
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            wod VARCHAR(10) NOT NULL,
+            score VARCHAR(20) NOT NULL,
+            score_value INTEGER,
+            created_at TIMESTAMP DEFAULT now(),
+            season INTEGER NOT NULL,
+            box VARCHAR(50) NOT NULL,
+            PRIMARY KEY (id, season)
+        ) PARTITION BY LIST (season);
+    """)
+    )
+    conn.execute(text("CREATE TABLE scores_default PARTITION OF scores DEFAULT;"))
+    for season in conn.execute(text("SELECT DISTINCT season FROM wods")).scalars():
+        ensure_season_partition(conn, season)
+    conn.execute(
+        text("""
+        INSERT INTO scores (id, user_id, wod, score, score_value, created_at, season, box)
+        SELECT s.id, s.user_id, s.wod, s.score, s.score_value, s.created_at,
+               COALESCE(w.season, 0), u.box
+        FROM scores_unpartitioned s
+        JOIN users u ON u.id = s.user_id
+        LEFT JOIN wods w ON w.wod = s.wod
+    """)
+    )
+    conn.execute(text("DROP TABLE scores_unpartitioned;"))
+    conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY scores.id;"))
+    # Index partitionnés : créés sur chaque partition, présente ou future
+    conn.execute(text("CREATE UNIQUE INDEX uq_scores_user_wod ON scores(user_id, wod, season);"))
+    conn.execute(text("CREATE INDEX idx_scores_wod_value ON scores(wod, score_value);"))
+
+
+MIGRATIONS: list[tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "tables users/scores/wods, seed WODs 26.x, index", _v1_initial),
+    (2, "scores.score_value + backfill + index (wod, score_value)", _v2_score_value),
+    (3, "table leaderboard matérialisée", _v3_leaderboard),
+    (4, "compteur data_version (invalidation des caches)", _v4_data_version),
+    (5, "index leaderboard(user_id, sex, level, wod)", _v5_leaderboard_user_index),
+    (6, "unicité scores(user_id, wod) (upsert)", _v6_unique_user_wod),
+    (7, "sketches de quantiles par (wod, sex, level)", _v7_score_sketches),
+    (8, "index leaderboard pagination (place, user_id)", _v8_leaderboard_keyset_index),
+    (9, "Overall : WOD non saisi = effectif + 1", _v9_overall_missing_wods),
+    (10, "version du catalogue des WODs (data_version id=2)", _v10_wod_catalog_version),
+    (11, "saisons / boxes, scores partitionnés par saison", _v11_seasons_and_boxes),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(engine: Engine) -> int:
+    """Version appliquée (0 si 'schema_version' n'existe pas encore) : une seule requête."""
+    with engine.connect() as conn:
+        try:
+            return conn.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+        except (OperationalError, ProgrammingError):
+            return 0
+
+
+def migrate(engine: Engine | None = None) -> list[int]:
+    """Applique les migrations en attente, chacune dans sa transaction ; renvoie leurs versions."""
+    engine = engine or get_engine(check_schema=False)
+    applied = []
+    with engine.begin() as conn:
+        conn.execute(_SCHEMA_VERSION_DDL)
+    for version, description, apply in MIGRATIONS:
+        with engine.begin() as conn:
+            if engine.dialect.name == "postgresql":
+                # Un seul processus migre à la fois
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext('schema_version'))"))
+            done = conn.execute(
+                text("SELECT 1 FROM schema_version WHERE version = :v"), {"v": version}
+            ).first()
+            if done:
+                continue
+            apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_version (version, description) VALUES (:v, :d)"),
+                {"v": version, "d": description},
+            )
+            applied.append(version)
+    return applied
+
+
+def ensure_schema(engine: Engine) -> None:
+    """
+    Vérification au démarrage (une requête). Si le schéma est en retard : migration
+    automatique si database.auto_migrate / DB_AUTO_MIGRATE est actif, sinon erreur explicite.
+    """
+    version = current_version(engine)
+    if version >= SCHEMA_VERSION:
+        return
+    if (db_setting("auto_migrate") or "").lower() in ("1", "true", "yes"):
+        migrate(engine)
+        return
+    raise RuntimeError(
+        f"Schéma DB en version {version}, version attendue {SCHEMA_VERSION} : "
+        "lancez `python -m infra.migrations` (ou activez database.auto_migrate)."
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrations du schéma de la base.")
+    parser.add_argument("--check", action="store_true", help="affiche la version sans migrer")
+    args = parser.parse_args()
+
+    engine = get_engine(check_schema=False)
+    if args.check:
+        print(f"schéma : version {current_version(engine)} / attendue {SCHEMA_VERSION}")
+        return
+    applied = migrate(engine)
+    print(f"migrations appliquées : {applied or 'aucune'} (version {SCHEMA_VERSION})")
+
+
+if __name__ == "__main__":
+    main()
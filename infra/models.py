@@ -0,0 +1,116 @@
+# infra/models.py
+"""Modèles SQLAlchemy : aucun effet de bord à l'import (schéma géré par infra.migrations)."""
+
+from __future__ import annotations
+
+from sqlalchemy import (
+    TIMESTAMP,
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    func,
+)
+from sqlalchemy.orm import declarative_base, relationship
+
+Base = declarative_base()
+
+# Box par défaut (athlètes inscrits avant l'ajout des boxes, déploiement mono-box)
+DEFAULT_BOX = "main"
+
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True)
+    name = Column(String(255), nullable=False)
+    email = Column(String(255), unique=True, nullable=False)
+    password = Column(String(255), nullable=False)
+    sex = Column(String(10), nullable=False)
+    birth_year = Column(Integer, nullable=False)
+    level = Column(String(10), nullable=False)
+    category = Column(String(20), nullable=False)
+    age = Column(Integer, nullable=False)
+    box = Column(String(50), nullable=False, server_default=DEFAULT_BOX)
+    scores = relationship("Score", back_populates="user", cascade="all, delete")
+
+
+class Score(Base):
+    __tablename__ = "scores"
+    # Un score par athlète et par WOD : cible de l'upsert (infra.scores). Sous Postgres la
+    # table est partitionnée par saison (infra.migrations) : la clé de partition fait partie
+    # de l'index unique et de la clé primaire physique (id, season).
+    __table_args__ = (Index("uq_scores_user_wod", "user_id", "wod", "season", unique=True),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    wod = Column(String(10), nullable=False)  # '26.1' etc.
+    score = Column(String(20), nullable=False)  # 'MM:SS' ou répétitions
+    # Clé de tri normalisée à l'écriture : secondes (time, CAP inclus) ou répétitions (reps)
+    score_value = Column(Integer, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    # Dénormalisés à l'écriture : saison du WOD, box de l'athlète (filtres sans jointure)
+    season = Column(Integer, nullable=False)
+    box = Column(String(50), nullable=False)
+    user = relationship("User", back_populates="scores")
+
+
+class Wod(Base):
+    __tablename__ = "wods"
+    wod = Column(String(10), primary_key=True)  # '26.1'
+    label = Column(String(100), nullable=False)
+    type = Column(String(10), nullable=False)  # 'time' | 'reps'
+    timecap_seconds = Column(Integer, nullable=True)  # cap en secondes
+    season = Column(Integer, nullable=False)  # 2026
+    box = Column(String(50), nullable=True)  # NULL = WOD officiel, commun à toutes les boxes
+
+    @property
+    def sort_desc(self) -> bool:
+        return score_sort_desc(self.type)
+
+
+class Leaderboard(Base):
+    """Classement matérialisé, maintenu à chaque écriture de score (voir infra.ranking)."""
+
+    __tablename__ = "leaderboard"
+    season = Column(Integer, primary_key=True)
+    box = Column(String(50), primary_key=True)
+    wod = Column(String(10), primary_key=True)  # '26.1' ... ou 'Overall' (de la saison)
+    sex = Column(String(10), primary_key=True)
+    level = Column(String(10), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(String(20), nullable=True)  # score brut affiché (NULL pour 'Overall')
+    place = Column(Integer, nullable=False)
+    points = Column(Integer, nullable=False)
+
+
+class ScoreSketch(Base):
+    """Sketch de quantiles (infra.quantiles) des score_value d'une division pour un WOD."""
+
+    __tablename__ = "score_sketches"
+    wod = Column(String(10), primary_key=True)
+    sex = Column(String(10), primary_key=True)
+    level = Column(String(10), primary_key=True)
+    box = Column(String(50), primary_key=True)
+    sketch = Column(LargeBinary, nullable=False)  # QuantileSketch.to_bytes()
+    count = Column(Integer, nullable=False)
+    # Exact (somme fusionnable) : les centroïdes à cheval sur le cap le rendraient approché
+    before_cap = Column(Integer, nullable=False, default=0)
+    updated_at = Column(TIMESTAMP, server_default=func.now())
+
+
+class DataVersion(Base):
+    """
+    Compteurs d'invalidation : id=1 incrémenté à chaque écriture de score (caches de
+    résultats), id=2 à chaque modification de 'wods' (catalogue, infra.wods).
+    """
+
+    __tablename__ = "data_version"
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+def score_sort_desc(wod_type: str | None) -> bool:
+    """Sens du classement sur score_value : 'time' => ASC (plus court), 'reps' => DESC."""
+    return wod_type != "time"
@@ -0,0 +1,78 @@
+# infra/points.py
+"""
+Moteur de points de l'Overall, vectorisé (pandas / NumPy).
+
+Entrée longue (une ligne par score) -> matrice athlètes x WODs, puis :
+- place par WOD = RANK « min » : ex aequo = même place, le suivant saute (1, 2, 2, 4) ;
+- score présent mais invalide (score_value NULL) : place après tous les scores valides ;
+- WOD non saisi : place après tous les athlètes ayant un score sur ce WOD (effectif + 1) ;
+- points = somme des places, place Overall = RANK « min » des points.
+
+Mêmes règles que le rafraîchissement SQL de 'leaderboard' (infra.ranking).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def min_rank(keys: np.ndarray) -> np.ndarray:
+    """RANK « min » de clés croissantes (1 + nombre de clés strictement inférieures)."""
+    order = np.argsort(keys, kind="stable")
+    ordered = keys[order]
+    positions = np.arange(ordered.size)
+    # Début de chaque groupe d'ex aequo, propagé à tout le groupe
+    starts = np.maximum.accumulate(np.where(np.r_[True, ordered[1:] != ordered[:-1]], positions, 0))
+    ranks = np.empty(keys.size, dtype=np.int64)
+    ranks[order] = starts + 1
+    return ranks
+
+
+def overall_points(
+    user_ids: Sequence[int],
+    wods: Sequence[str],
+    values: Sequence[float | None],
+    sort_desc: Mapping[str, bool],
+) -> pd.DataFrame:
+    """
+    `user_ids`, `wods`, `values` : colonnes d'égale longueur (score_value, None / NaN si
+    invalide) ; `sort_desc` : sens de chaque WOD (True = plus grand est meilleur).
+    Renvoie un DataFrame indexé par user_id : une colonne de place par WOD,
+    'points' et 'place', trié par place puis user_id.
+    """
+    wod_codes = pd.Categorical(np.asarray(wods, dtype=object), categories=list(sort_desc)).codes
+    keep = wod_codes >= 0
+    present_wods = np.unique(wod_codes[keep])
+    columns = [list(sort_desc)[c] for c in present_wods]
+    if not columns:
+        return pd.DataFrame(columns=[*columns, "points", "place"], dtype="int64")
+
+    # Matrices athlètes x WODs (un score par (user_id, wod) : contrainte uq_scores_user_wod).
+    # Clé croissante = meilleur d'abord : les WODs « plus grand est meilleur » sont négatés.
+    users, row = np.unique(np.asarray(user_ids)[keep], return_inverse=True)
+    col = np.searchsorted(present_wods, wod_codes[keep])
+    sign = np.where([sort_desc[w] for w in columns], -1.0, 1.0)
+    key = np.full((users.size, len(columns)), np.nan)
+    key[row, col] = np.asarray(values, dtype=np.float64)[keep] * sign[col]
+    present = np.zeros(key.shape, dtype=bool)
+    present[row, col] = True
+
+    places = np.empty(key.shape, dtype=np.int64)
+    for j in range(len(columns)):
+        valid = ~np.isnan(key[:, j])
+        places[:, j] = present[:, j].sum() + 1
+        places[present[:, j] & ~valid, j] = valid.sum() + 1
+        places[valid, j] = min_rank(key[valid, j])
+
+    points = places.sum(axis=1)
+    place = min_rank(points)
+    order = np.lexsort((users, place))
+    result = pd.DataFrame(
+        places[order], index=pd.Index(users[order], name="user_id"), columns=columns
+    )
+    result["points"] = points[order]
+    result["place"] = place[order]
+    return result
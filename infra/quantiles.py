@@ -0,0 +1,181 @@
+# infra/quantiles.py
+"""
+Sketch de quantiles fusionnable (t-digest « merging », fonction d'échelle k1).
+
+Quelques dizaines de centroïdes (moyenne, poids) résument une distribution de taille
+quelconque : ajout incrémental, fusion de sketches (divisions, boxes), quantiles et rangs
+approchés (précision relative meilleure aux extrémités), sérialisation en quelques Ko.
+L'effectif est exact (poids entiers, exacts en float32 jusqu'à 2**24). La moyenne est
+approchée : exacte aux arrondis float64 près en mémoire, mais les centroïdes sérialisés
+sont des float32 (erreur relative ~1e-7 par centroïde).
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+DEFAULT_COMPRESSION = 100
+_HEADER = struct.Struct("<BHdd")  # version, compression, min, max
+_FORMAT_VERSION = 1
+
+
+def _k(q: np.ndarray | float, compression: int):
+    return compression / (2 * math.pi) * np.arcsin(2 * np.asarray(q) - 1)
+
+
+def _k_inv(k: float, compression: int) -> float:
+    return (math.sin(min(max(k * 2 * math.pi / compression, -math.pi / 2), math.pi / 2)) + 1) / 2
+
+
+class QuantileSketch:
+    """t-digest : centroïdes triés (means, weights) + tampon de valeurs non fusionnées."""
+
+    def __init__(
+        self,
+        compression: int = DEFAULT_COMPRESSION,
+        means: Sequence[float] = (),
+        weights: Sequence[float] = (),
+        vmin: float = math.inf,
+        vmax: float = -math.inf,
+    ):
+        self.compression = compression
+        self.means = np.asarray(means, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.min = vmin
+        self.max = vmax
+        self._buffer: list[float] = []
+
+    # --- construction -----------------------------------------------------------------
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], compression: int = DEFAULT_COMPRESSION):
+        """Construction directe (vectorisée) depuis toutes les valeurs d'une division."""
+        data = np.sort(
+            np.asarray(values if isinstance(values, np.ndarray) else list(values), float)
+        )
+        data = data[~np.isnan(data)]
+        sketch = cls(compression)
+        if data.size:
+            # Centroïde = valeurs dont le q central tombe dans la même unité de k
+            q = (np.arange(data.size) + 0.5) / data.size
+            bucket = np.floor(_k(q, compression) - _k(0.0, compression)).astype(np.int64)
+            _, start, counts = np.unique(bucket, return_index=True, return_counts=True)
+            sketch.means = np.add.reduceat(data, start) / counts
+            sketch.weights = counts.astype(np.float64)
+            sketch.min, sketch.max = float(data[0]), float(data[-1])
+        return sketch
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        if value is None or math.isnan(value):
+            return
+        if weight != 1.0:
+            self._merge_centroids([float(value)], [float(weight)])
+            return
+        self._buffer.append(float(value))
+        if len(self._buffer) >= 5 * self.compression:
+            self._flush()
+
+    def merge(self, *others: QuantileSketch) -> QuantileSketch:
+        """Nouveau sketch fusionnant self et others (ex. niveaux d'un même sexe, boxes)."""
+        result = QuantileSketch(self.compression)
+        for sketch in (self, *others):
+            sketch._flush()
+            if sketch.count:
+                result._merge_centroids(sketch.means, sketch.weights)
+                result.min = min(result.min, sketch.min)
+                result.max = max(result.max, sketch.max)
+        return result
+
+    def _flush(self) -> None:
+        if self._buffer:
+            buffer, self._buffer = self._buffer, []
+            self.min = min(self.min, min(buffer))
+            self.max = max(self.max, max(buffer))
+            self._merge_centroids(buffer, np.ones(len(buffer)))
+
+    def _merge_centroids(self, means, weights) -> None:
+        means = np.concatenate([self.means, np.asarray(means, dtype=np.float64)])
+        weights = np.concatenate([self.weights, np.asarray(weights, dtype=np.float64)])
+        if means.size == 0:
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        self.min = min(self.min, float(means[0]))
+        self.max = max(self.max, float(means[-1]))
+
+        total = weights.sum()
+        out_means: list[float] = []
+        out_weights: list[float] = []
+        cur_mean, cur_weight = means[0], weights[0]
+        done = 0.0
+        q_limit = _k_inv(float(_k(0.0, self.compression)) + 1, self.compression)
+        for mean, weight in zip(means[1:], weights[1:], strict=True):
+            if (done + cur_weight + weight) / total <= q_limit:
+                cur_weight += weight
+                cur_mean += (mean - cur_mean) * weight / cur_weight
+            else:
+                out_means.append(cur_mean)
+                out_weights.append(cur_weight)
+                done += cur_weight
+                q_limit = _k_inv(float(_k(done / total, self.compression)) + 1, self.compression)
+                cur_mean, cur_weight = mean, weight
+        out_means.append(cur_mean)
+        out_weights.append(cur_weight)
+        self.means = np.asarray(out_means)
+        self.weights = np.asarray(out_weights)
+
+    # --- lecture ------------------------------------------------------------------------
+
+    @property
+    def count(self) -> int:
+        return int(round(self.weights.sum())) + len(self._buffer)
+
+    def mean(self) -> float | None:
+        self._flush()
+        return float(np.average(self.means, weights=self.weights)) if self.count else None
+
+    def _knots(self) -> tuple[np.ndarray, np.ndarray]:
+        # Points d'interpolation : (rang cumulé au centre de chaque centroïde, moyenne),
+        # bornés par (0, min) et (effectif, max)
+        self._flush()
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate([[0.0], centers, [self.weights.sum()]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return ranks, values
+
+    def quantiles(self, qs: Sequence[float]) -> list[float] | None:
+        """Quantiles approchés (qs dans [0, 1]) ; None si le sketch est vide."""
+        if not self.count:
+            return None
+        ranks, values = self._knots()
+        return np.interp(np.asarray(qs) * ranks[-1], ranks, values).tolist()
+
+    def rank(self, value: float) -> float:
+        """Nombre approché de valeurs < value."""
+        if not self.count:
+            return 0.0
+        ranks, values = self._knots()
+        return float(np.interp(value, values, ranks, left=0.0, right=ranks[-1]))
+
+    # --- sérialisation ------------------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        """En-tête + moyennes puis poids des centroïdes en float32 : ~8 o par centroïde."""
+        self._flush()
+        header = _HEADER.pack(_FORMAT_VERSION, self.compression, self.min, self.max)
+        return header + self.means.astype("<f4").tobytes() + self.weights.astype("<f4").tobytes()
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> QuantileSketch:
+        version, compression, vmin, vmax = _HEADER.unpack_from(blob)
+        if version != _FORMAT_VERSION:
+            raise ValueError(f"Format de sketch inconnu : {version}")
+        arrays = np.frombuffer(blob, dtype="<f4", offset=_HEADER.size)
+        n = arrays.size // 2
+        return cls(
+            compression, arrays[:n].astype(np.float64), arrays[n:].astype(np.float64), vmin, vmax
+        )
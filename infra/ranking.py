@@ -0,0 +1,421 @@
+# infra/ranking.py
+from __future__ import annotations
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.db import fetch_all, get_session
+from infra.models import DEFAULT_BOX, score_sort_desc
+from infra.points import overall_points
+
+# Ordre de classement d'un WOD : secondes croissantes pour 'time', reps décroissantes sinon
+_ORDER_BY_VALUE = "CASE WHEN w.type = 'time' THEN s.score_value ELSE -s.score_value END NULLS LAST"
+
+_WOD_SEASON_SQL = text("SELECT season FROM wods WHERE wod = :wod")
+
+# Scores bruts d'une division : places et points calculés par infra.points (vectorisé)
+_DIVISION_SCORES_SQL = text("""
+    SELECT u.id, u.name, u.level, u.sex, s.wod, s.score, s.score_value, w.type
+    FROM scores s
+    JOIN users u ON u.id = s.user_id
+    JOIN wods w ON w.wod = s.wod
+    WHERE s.season = :season AND s.box = :box
+      AND u.sex = :sex AND u.level = :level AND s.wod IN :wods
+""").bindparams(bindparam("wods", expanding=True))
+
+
+def classement_overall(
+    season: int, sex: str, level: str, wods: list[str], box: str = DEFAULT_BOX
+) -> list[dict]:
+    """
+    Classement général d'une division (saison, box, sexe, niveau) calculé à la volée (un
+    aller-retour DB, puis infra.points.overall_points). Renvoie une ligne par athlète :
+    {'user_id', 'name', 'level', 'sex', 'scores': {wod: score brut}, 'places': {wod: place},
+     'points': total des places, 'place': place Overall}.
+    """
+    if not wods:
+        return []
+    with get_session(readonly=True) as s:
+        rows = s.execute(
+            _DIVISION_SCORES_SQL,
+            {"season": season, "box": box, "sex": sex, "level": level, "wods": list(wods)},
+        ).all()
+    if not rows:
+        return []
+
+    athletes: dict[int, dict] = {}
+    wod_types: dict[str, str] = {}
+    for user_id, name, lvl, sx, wod, score, _, wod_type in rows:
+        wod_types[wod] = wod_type
+        athletes.setdefault(
+            user_id, {"user_id": user_id, "name": name, "level": lvl, "sex": sx, "scores": {}}
+        )["scores"][wod] = score
+
+    table = overall_points(
+        [r[0] for r in rows],
+        [r[4] for r in rows],
+        [r[6] for r in rows],
+        {w: score_sort_desc(wod_types[w]) for w in wods if w in wod_types},
+    )
+    wod_columns = [c for c in table.columns if c not in ("points", "place")]
+    places = table[wod_columns].to_numpy().tolist()
+    return [
+        {
+            **athletes[user_id],
+            "places": dict(zip(wod_columns, wod_places, strict=True)),
+            "points": points,
+            "place": place,
+        }
+        for user_id, wod_places, points, place in zip(
+            table.index.tolist(),
+            places,
+            table["points"].tolist(),
+            table["place"].tolist(),
+            strict=True,
+        )
+    ]
+
+
+# ---------- Table 'leaderboard' (matérialisée) ----------
+# Une division = (saison, box, sexe, niveau) ; l'Overall est calculé par saison.
+# Les filtres NULL = "toutes les valeurs" : mêmes requêtes pour le rafraîchissement
+# d'une division (écriture de score) et pour la reconstruction complète (migration).
+# Valeurs liées par le driver dans le texte SQL : "2026 IS NULL OR s.season = 2026" se
+# réduit à "s.season = 2026" dès la planification (élagage des partitions de 'scores').
+_LB_DELETE_SQL = text("""
+    DELETE FROM leaderboard
+    WHERE (:season IS NULL OR season = :season)
+      AND (:wod IS NULL OR wod = :wod OR wod = 'Overall')
+      AND (:box IS NULL OR box = :box)
+      AND (:sex IS NULL OR sex = :sex)
+      AND (:level IS NULL OR level = :level)
+""")
+
+_LB_INSERT_WOD_SQL = text(f"""
+    INSERT INTO leaderboard (season, box, wod, sex, level, user_id, score, place, points)
+    SELECT season, box, wod, sex, level, user_id, score, place, place
+    FROM (
+        SELECT s.season, s.box, s.wod, u.sex, u.level, u.id AS user_id, s.score,
+               RANK() OVER (
+                   PARTITION BY s.box, s.wod, u.sex, u.level
+                   ORDER BY {_ORDER_BY_VALUE}
+               ) AS place
+        FROM scores s
+        JOIN users u ON u.id = s.user_id
+        JOIN wods w ON w.wod = s.wod
+        WHERE (:season IS NULL OR s.season = :season)
+          AND (:wod IS NULL OR s.wod = :wod)
+          AND (:box IS NULL OR s.box = :box)
+          AND (:sex IS NULL OR u.sex = :sex)
+          AND (:level IS NULL OR u.level = :level)
+    ) ranked
+""")
+
+# Overall : somme des places par WOD de la saison ; un WOD non saisi compte l'effectif du
+# WOD + 1 (place derrière tous les athlètes classés), mêmes règles que infra.points.
+_LB_DIVISION_FILTER = """
+              AND (:season IS NULL OR season = :season)
+              AND (:box IS NULL OR box = :box)
+              AND (:sex IS NULL OR sex = :sex)
+              AND (:level IS NULL OR level = :level)"""
+
+_LB_INSERT_OVERALL_SQL = text(f"""
+    INSERT INTO leaderboard (season, box, wod, sex, level, user_id, score, place, points)
+    SELECT season, box, 'Overall', sex, level, user_id, NULL,
+           RANK() OVER (PARTITION BY season, box, sex, level ORDER BY points),
+           points
+    FROM (
+        SELECT a.season, a.box, a.sex, a.level, a.user_id,
+               SUM(COALESCE(l.points, n.missing)) AS points
+        FROM (
+            SELECT DISTINCT season, box, sex, level, user_id FROM leaderboard
+            WHERE wod <> 'Overall' {_LB_DIVISION_FILTER}
+        ) a
+        JOIN (
+            SELECT season, box, sex, level, wod, COUNT(*) + 1 AS missing FROM leaderboard
+            WHERE wod <> 'Overall' {_LB_DIVISION_FILTER}
+            GROUP BY season, box, sex, level, wod
+        ) n ON n.season = a.season AND n.box = a.box AND n.sex = a.sex AND n.level = a.level
+        LEFT JOIN leaderboard l
+          ON l.season = a.season AND l.box = a.box AND l.wod = n.wod
+         AND l.sex = a.sex AND l.level = a.level AND l.user_id = a.user_id
+        GROUP BY a.season, a.box, a.sex, a.level, a.user_id
+    ) totals
+""")
+
+_LB_WOD_SQL = text("""
+    SELECT u.name, l.score, l.place, l.points
+    FROM leaderboard l
+    JOIN users u ON u.id = l.user_id
+    WHERE l.box = :box AND l.sex = :sex AND l.level = :level AND l.wod = :wod
+      AND l.season = :season
+    ORDER BY l.place, u.name
+""")
+
+_LB_OVERALL_SQL = text("""
+    SELECT o.user_id, u.name, o.level, o.sex, o.place, o.points, w.wod, w.score
+    FROM leaderboard o
+    JOIN users u ON u.id = o.user_id
+    LEFT JOIN leaderboard w
+      ON w.user_id = o.user_id AND w.season = o.season AND w.box = o.box
+     AND w.sex = o.sex AND w.level = o.level AND w.wod <> 'Overall'
+    WHERE o.box = :box AND o.sex = :sex AND o.level = :level
+      AND o.wod = 'Overall' AND o.season = :season
+    ORDER BY o.place, u.name, o.user_id
+""")
+
+
+# ---------- Pages du classement (pagination par curseur) ----------
+# Curseur = (place, user_id) de la dernière ligne affichée : chaque page est une recherche
+# dans l'index (box, sex, level, wod, season, place, user_id) suivie d'un LIMIT, quelle
+# que soit sa profondeur (pas d'OFFSET). Une ligne de plus est lue pour savoir s'il reste
+# une page. WOD comme Overall sont filtrés par saison : toutes les colonnes de l'index
+# avant (place, user_id) sont fixées, pas de tri.
+Cursor = tuple[int, int]
+PAGE_SIZE = 50
+_KEYSET = "AND (l.place, l.user_id) > (:after_place, :after_id)"
+
+_LB_WOD_PAGE_SQL = """
+    SELECT l.user_id, u.name, l.score, l.place, l.points
+    FROM leaderboard l
+    JOIN users u ON u.id = l.user_id
+    WHERE l.box = :box AND l.sex = :sex AND l.level = :level AND l.wod = :wod
+      AND l.season = :season {keyset}
+    ORDER BY l.place, l.user_id
+    LIMIT :limit
+"""
+
+_LB_OVERALL_PAGE_SQL = """
+    WITH page AS (
+        SELECT l.user_id, l.season, l.box, l.sex, l.level, l.place, l.points
+        FROM leaderboard l
+        WHERE l.box = :box AND l.sex = :sex AND l.level = :level
+          AND l.wod = 'Overall' AND l.season = :season {keyset}
+        ORDER BY l.place, l.user_id
+        LIMIT :limit
+    )
+    SELECT p.user_id, u.name, p.level, p.sex, p.place, p.points, w.wod, w.score
+    FROM page p
+    JOIN users u ON u.id = p.user_id
+    LEFT JOIN leaderboard w
+      ON w.user_id = p.user_id AND w.season = p.season AND w.box = p.box
+     AND w.sex = p.sex AND w.level = p.level AND w.wod <> 'Overall'
+    ORDER BY p.place, p.user_id
+"""
+
+_PAGE_SQL = {
+    (name, keyset is not None): text(sql.format(keyset=keyset or ""))
+    for name, sql in (("wod", _LB_WOD_PAGE_SQL), ("overall", _LB_OVERALL_PAGE_SQL))
+    for keyset in (None, _KEYSET)
+}
+
+
+def _page_params(after: Cursor | None, limit: int, **filters) -> dict:
+    params = {**filters, "limit": limit + 1}
+    if after is not None:
+        params["after_place"], params["after_id"] = after
+    return params
+
+
+def leaderboard_wod_page(
+    wod: str,
+    season: int,
+    sex: str,
+    level: str,
+    box: str = DEFAULT_BOX,
+    after: Cursor | None = None,
+    limit: int = PAGE_SIZE,
+) -> dict:
+    """
+    Page du classement d'un WOD après le curseur `after` (None : première page) :
+    {'rows': [{'user_id', 'name', 'score', 'place', 'points'}], 'next': curseur | None}.
+    """
+    params = _page_params(after, limit, wod=wod, season=season, sex=sex, level=level, box=box)
+    with get_session(readonly=True) as s:
+        rows = s.execute(_PAGE_SQL[("wod", after is not None)], params).all()
+    return _wod_page(rows, limit)
+
+
+async def leaderboard_wod_page_async(
+    wod: str,
+    season: int,
+    sex: str,
+    level: str,
+    box: str = DEFAULT_BOX,
+    after: Cursor | None = None,
+    limit: int = PAGE_SIZE,
+) -> dict:
+    """Variante asynchrone de leaderboard_wod_page (cf. infra.cache.cached_gather)."""
+    params = _page_params(after, limit, wod=wod, season=season, sex=sex, level=level, box=box)
+    return _wod_page(await fetch_all(_PAGE_SQL[("wod", after is not None)], params), limit)
+
+
+def _wod_page(rows, limit: int) -> dict:
+    page = [
+        {"user_id": user_id, "name": name, "score": score, "place": place, "points": points}
+        for user_id, name, score, place, points in rows[:limit]
+    ]
+    return _with_next(page, len(rows) > limit)
+
+
+def _with_next(page: list[dict], has_next: bool) -> dict:
+    return {"rows": page, "next": (page[-1]["place"], page[-1]["user_id"]) if has_next else None}
+
+
+def leaderboard_overall_page(
+    season: int,
+    sex: str,
+    level: str,
+    box: str = DEFAULT_BOX,
+    after: Cursor | None = None,
+    limit: int = PAGE_SIZE,
+) -> dict:
+    """Page du classement général (lignes de leaderboard_overall), cf. leaderboard_wod_page."""
+    params = _page_params(after, limit, season=season, sex=sex, level=level, box=box)
+    with get_session(readonly=True) as s:
+        rows = s.execute(_PAGE_SQL[("overall", after is not None)], params).all()
+    page = _overall_athletes(rows)
+    return _with_next(page[:limit], len(page) > limit)
+
+
+async def leaderboard_overall_page_async(
+    season: int,
+    sex: str,
+    level: str,
+    box: str = DEFAULT_BOX,
+    after: Cursor | None = None,
+    limit: int = PAGE_SIZE,
+) -> dict:
+    """Variante asynchrone de leaderboard_overall_page."""
+    params = _page_params(after, limit, season=season, sex=sex, level=level, box=box)
+    page = _overall_athletes(await fetch_all(_PAGE_SQL[("overall", after is not None)], params))
+    return _with_next(page[:limit], len(page) > limit)
+
+
+def _overall_athletes(rows) -> list[dict]:
+    # Lignes (athlète, WOD) -> une entrée par athlète avec ses scores, dans l'ordre reçu
+    athletes: dict[int, dict] = {}
+    for user_id, name, lvl, sx, place, points, wod, score in rows:
+        entry = athletes.setdefault(
+            user_id,
+            {
+                "user_id": user_id,
+                "name": name,
+                "level": lvl,
+                "sex": sx,
+                "scores": {},
+                "place": place,
+                "points": points,
+            },
+        )
+        if wod is not None:
+            entry["scores"][wod] = score
+    return list(athletes.values())
+
+
+# ---------- Position d'un athlète ----------
+# Place = 1 + nombre de meilleurs scores, déjà matérialisée dans 'leaderboard' : lignes de
+# l'athlète via idx_leaderboard_user. Effectif de la division sans la parcourir :
+# dernière place (max sur l'index (box, sex, level, wod, season, place, user_id)) + ex
+# aequo à cette place - 1. Quelques recherches d'index, quelle que soit la division.
+_ATHLETE_RANK_SQL = text("""
+    WITH mine AS (
+        SELECT m.season, m.box, m.wod, m.sex, m.level, m.score, m.place, m.points,
+               (SELECT max(d.place) FROM leaderboard d
+                WHERE d.box = m.box AND d.sex = m.sex AND d.level = m.level
+                  AND d.wod = m.wod AND d.season = m.season) AS last_place
+        FROM leaderboard m
+        WHERE m.user_id = :user_id AND m.season = :season
+          AND m.sex = :sex AND m.level = :level
+    )
+    SELECT wod, score, place, points,
+           last_place - 1 + (SELECT count(*) FROM leaderboard d
+                             WHERE d.box = mine.box AND d.sex = mine.sex
+                               AND d.level = mine.level AND d.wod = mine.wod
+                               AND d.season = mine.season
+                               AND d.place = mine.last_place) AS total
+    FROM mine
+""")
+
+
+def athlete_rank(user_id: int, season: int, sex: str, level: str) -> dict[str, dict]:
+    """
+    Position de l'athlète dans sa division (sa box) sur une saison, par WOD et 'Overall' :
+    {wod: {'score', 'place', 'points', 'total', 'top_percent'}} ({} sans score).
+    'top_percent' : part de la division classée devant ou à égalité (1 % = tête).
+    """
+    with get_session(readonly=True) as s:
+        rows = s.execute(
+            _ATHLETE_RANK_SQL,
+            {"user_id": user_id, "season": season, "sex": sex, "level": level},
+        ).all()
+    return _athlete_ranks(rows)
+
+
+async def athlete_rank_async(user_id: int, season: int, sex: str, level: str) -> dict[str, dict]:
+    """Variante asynchrone de athlete_rank."""
+    params = {"user_id": user_id, "season": season, "sex": sex, "level": level}
+    return _athlete_ranks(await fetch_all(_ATHLETE_RANK_SQL, params))
+
+
+def _athlete_ranks(rows) -> dict[str, dict]:
+    return {
+        wod: {
+            "score": score,
+            "place": place,
+            "points": points,
+            "total": total,
+            "top_percent": 100.0 * place / total,
+        }
+        for wod, score, place, points, total in rows
+    }
+
+
+def refresh_leaderboard(
+    conn: Session | Connection,
+    wod: str | None = None,
+    sex: str | None = None,
+    level: str | None = None,
+    box: str | None = None,
+) -> None:
+    """
+    Recalcule les places de (wod, sex, level, box) + l'Overall de la division pour la
+    saison du WOD, dans la transaction de l'appelant. Sans argument : reconstruction
+    complète (toutes saisons et boxes).
+    """
+    # Saison passée en littéral : seules ses partitions de 'scores' sont parcourues
+    season = conn.execute(_WOD_SEASON_SQL, {"wod": wod}).scalar() if wod else None
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    if bind.dialect.name == "postgresql":
+        # Sérialise les rafraîchissements concurrents d'une même division
+        conn.execute(
+            text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+            {"key": f"leaderboard:{box or '*'}:{sex or '*'}:{level or '*'}"},
+        )
+    params = {"season": season, "wod": wod, "sex": sex, "level": level, "box": box}
+    conn.execute(_LB_DELETE_SQL, params)
+    conn.execute(_LB_INSERT_WOD_SQL, params)
+    conn.execute(_LB_INSERT_OVERALL_SQL, {"season": season, "sex": sex, "level": level, "box": box})
+
+
+def leaderboard_wod(
+    wod: str, season: int, sex: str, level: str, box: str = DEFAULT_BOX
+) -> list[dict]:
+    """Classement d'un WOD (de sa saison) pour une division, lu depuis 'leaderboard'."""
+    params = {"wod": wod, "season": season, "sex": sex, "level": level, "box": box}
+    with get_session(readonly=True) as s:
+        rows = s.execute(_LB_WOD_SQL, params).all()
+    return [
+        {"name": name, "score": score, "place": place, "points": points}
+        for name, score, place, points in rows
+    ]
+
+
+def leaderboard_overall(season: int, sex: str, level: str, box: str = DEFAULT_BOX) -> list[dict]:
+    """Classement général d'une division sur une saison, lu depuis 'leaderboard'."""
+    with get_session(readonly=True) as s:
+        rows = s.execute(
+            _LB_OVERALL_SQL, {"season": season, "sex": sex, "level": level, "box": box}
+        ).all()
+    return _overall_athletes(rows)
@@ -0,0 +1,150 @@
+# infra/score_import.py
+"""
+Import groupé de scores (saisie des juges / coachs) depuis un CSV : email,wod,score.
+
+Chaque ligne est validée avec les règles de la saisie (MM:SS / CAP:XX pour les WODs au
+temps, répétitions sinon) ; les lignes valides sont écrites en upserts groupés dans une
+seule transaction, les autres sont rapportées avec leur numéro de ligne.
+
+CLI : python -m infra.score_import heat.csv [--dry-run]
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import sys
+import time
+from collections.abc import Iterable
+from typing import IO
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.db import get_session
+from infra.scores import save_scores
+from infra.scoring import parse_scores
+from infra.wods import wod_catalog
+
+CSV_COLUMNS = ("email", "wod", "score")
+
+_USERS_SQL = text("SELECT id, email, sex, level, box FROM users WHERE email IN :emails").bindparams(
+    bindparam("emails", expanding=True)
+)
+
+
+def read_csv(stream: IO[str]) -> list[dict]:
+    """Lignes du CSV ({'line', 'email', 'wod', 'score'}) ; ValueError si une colonne manque."""
+    reader = csv.DictReader(stream)
+    fields = {(f or "").strip().lower(): f for f in reader.fieldnames or []}
+    missing = [c for c in CSV_COLUMNS if c not in fields]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)} (attendu : email,wod,score)")
+    return [
+        {"line": reader.line_num, **{c: (row[fields[c]] or "").strip() for c in CSV_COLUMNS}}
+        for row in reader
+    ]
+
+
+def validate_rows(
+    conn: Session | Connection, rows: Iterable[dict], box: str | None = None
+) -> tuple[list[dict], list]:
+    """
+    Une requête (athlètes du fichier) quel que soit le nombre de lignes ; les WODs viennent
+    du catalogue en mémoire (infra.wods). Avec `box`, les athlètes d'une autre box sont
+    refusés.
+    Renvoie (lignes valides prêtes pour save_scores, erreurs [(ligne, message)]).
+    Une même paire (email, wod) présente plusieurs fois : la dernière ligne l'emporte.
+    """
+    rows = list(rows)
+    emails = sorted({r["email"] for r in rows if r["email"]})
+    users = {
+        email: (user_id, sex, level, user_box)
+        for user_id, email, sex, level, user_box in (
+            conn.execute(_USERS_SQL, {"emails": emails}).all() if emails else []
+        )
+    }
+    wods = wod_catalog()
+
+    values = parse_scores(
+        [r["score"] for r in rows],
+        [wods[r["wod"]].type if r["wod"] in wods else None for r in rows],
+        [wods[r["wod"]].timecap_seconds if r["wod"] in wods else None for r in rows],
+    )
+
+    errors: list[tuple[int, str]] = []
+    valid: dict[tuple[int, str], dict] = {}
+    for row, value in zip(rows, values, strict=True):
+        user = users.get(row["email"])
+        wod = wods.get(row["wod"])
+        if user is None:
+            errors.append((row["line"], f"Athlète inconnu : '{row['email']}'"))
+        elif box is not None and user[3] != box:
+            errors.append((row["line"], f"Athlète hors de la box '{box}' : '{row['email']}'"))
+        elif wod is None or wod.box not in (None, user[3]):
+            errors.append((row["line"], f"WOD inconnu : '{row['wod']}'"))
+        elif math.isnan(value):
+            expected = "'MM:SS' ou 'CAP:XX'" if wod.type == "time" else "un nombre de répétitions"
+            errors.append((row["line"], f"Score '{row['score']}' invalide : attendu {expected}"))
+        else:
+            user_id, sex, level, user_box = user
+            key = (user_id, row["wod"])
+            if key in valid:
+                errors.append((valid[key]["line"], f"Remplacé par la ligne {row['line']}"))
+            valid[key] = {
+                "line": row["line"],
+                "user_id": user_id,
+                "wod": row["wod"],
+                "score": row["score"].upper(),
+                "score_value": int(value),
+                "season": wod.season,
+                "box": user_box,
+                "sex": sex,
+                "level": level,
+            }
+    return list(valid.values()), sorted(errors)
+
+
+def import_scores(stream: IO[str], dry_run: bool = False, box: str | None = None) -> dict:
+    """
+    Valide puis écrit le CSV dans une transaction (rien n'est écrit avec dry_run) ; avec
+    `box`, seuls les athlètes de cette box sont importés.
+    Renvoie {'rows', 'imported', 'errors': [(ligne, message)], 'duration_ms'}.
+    """
+    start = time.perf_counter()
+    rows = read_csv(stream)
+    with get_session(readonly=dry_run) as s:
+        valid, errors = validate_rows(s, rows, box)
+        imported = 0 if dry_run else save_scores(s, valid)
+    return {
+        "rows": len(rows),
+        "imported": imported,
+        "valid": len(valid),
+        "errors": errors,
+        "duration_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import groupé de scores (CSV email,wod,score).")
+    parser.add_argument("csv", help="fichier CSV (en-tête : email,wod,score)")
+    parser.add_argument("--dry-run", action="store_true", help="valide sans rien écrire")
+    parser.add_argument("--box", help="n'importe que les athlètes de cette box")
+    args = parser.parse_args()
+
+    with open(args.csv, encoding="utf-8-sig", newline="") as f:
+        report = import_scores(f, args.dry_run, args.box)
+    for line, message in report["errors"]:
+        print(f"ligne {line} : {message}", file=sys.stderr)
+    print(
+        f"{report['rows']} lignes, {report['valid']} valides, {report['imported']} importées "
+        f"en {report['duration_ms']:.0f} ms"
+    )
+    if report["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+# infra/scores.py
+"""Écriture des scores : upsert (user_id, wod) + classement + version, dans une transaction."""
+
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.cache import bump_data_version
+from infra.live import notify_division
+from infra.models import Score
+from infra.ranking import refresh_leaderboard
+from infra.sketches import add_to_sketch, rebuild_sketches
+
+# Un seul aller-retour sur Postgres, sans lecture préalable : la contrainte
+# uq_scores_user_wod arbitre les soumissions concurrentes (la dernière écriture gagne,
+# jamais de doublon).
+# Saison (du WOD) et box (de l'athlète) sont lues dans la même instruction.
+_UPSERT_INSERT = """
+    INSERT INTO scores (user_id, wod, score, score_value, season, box)
+    SELECT :user_id, :wod, :score, :score_value, w.season, u.box
+    FROM wods w, users u
+    WHERE w.wod = :wod AND u.id = :user_id
+    ON CONFLICT (user_id, wod, season)
+    DO UPDATE SET score = excluded.score, score_value = excluded.score_value
+"""
+# 'replaced' vient de l'upsert lui-même : xmax <> 0 pour une ligne mise à jour par
+# ON CONFLICT (une lecture préalable de la ligne ne verrait pas une insertion concurrente
+# non encore validée)
+_UPSERT_SQL_PG = text(_UPSERT_INSERT + "RETURNING id, box, (xmax <> 0) AS replaced")
+_UPSERT_SQL = text(_UPSERT_INSERT + "RETURNING id, box")
+# SQLite (pas de xmax ; une CTE de la même instruction serait évaluée après l'insertion,
+# dans RETURNING) : lecture dans la transaction juste avant l'upsert. Un seul écrivain par
+# base : une écriture concurrente entre les deux fait échouer la transaction (SQLITE_BUSY).
+_PREVIOUS_SQL = text("""
+    SELECT count(*) FROM scores
+    WHERE user_id = :user_id AND wod = :wod
+      AND season = (SELECT season FROM wods WHERE wod = :wod)
+""")
+
+
+def upsert_score(
+    conn: Session | Connection, user_id: int, wod: str, score: str, score_value: int | None
+) -> tuple[int, bool, str]:
+    """
+    Insère ou remplace le score de (user_id, wod) ; renvoie (id de la ligne, remplacé ?,
+    box de l'athlète). ValueError si le WOD ou l'athlète n'existe pas.
+    """
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    params = {"user_id": user_id, "wod": wod, "score": score, "score_value": score_value}
+    if bind.dialect.name == "postgresql":
+        row = conn.execute(_UPSERT_SQL_PG, params).one_or_none()
+    else:
+        previous = conn.execute(_PREVIOUS_SQL, params).scalar()
+        row = conn.execute(_UPSERT_SQL, params).one_or_none()
+        if row is not None:
+            row = (*row, previous)
+    if row is None:
+        raise ValueError(f"WOD '{wod}' ou athlète {user_id} inconnu")
+    score_id, box, replaced = row
+    return score_id, bool(replaced), box
+
+
+def save_score(
+    conn: Session | Connection,
+    user_id: int,
+    wod: str,
+    score: str,
+    score_value: int | None,
+    sex: str,
+    level: str,
+) -> int:
+    """
+    Upsert du score puis mise à jour du classement matérialisé, du sketch de quantiles de
+    la division et de data_version, dans la transaction de l'appelant ; la division est
+    notifiée aux classements ouverts au commit (infra.live).
+    """
+    score_id, replaced, box = upsert_score(conn, user_id, wod, score, score_value)
+    # Après refresh_leaderboard : son verrou de division (Postgres) sérialise aussi le sketch
+    refresh_leaderboard(conn, wod, sex, level, box)
+    if replaced:
+        rebuild_sketches(conn, wod, sex, level, box)
+    elif score_value is not None:
+        add_to_sketch(conn, (wod, sex, level, box), score_value)
+    bump_data_version(conn)
+    notify_division(conn, wod, sex, level, box)
+    return score_id
+
+
+def _upsert_many_statement(dialect: str):
+    # insert() du dialecte : SQLAlchemy regroupe les lignes en INSERT multi-VALUES
+    # ("insertmanyvalues") au lieu d'un aller-retour par ligne
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(Score)
+    return stmt.on_conflict_do_update(
+        index_elements=[Score.user_id, Score.wod, Score.season],
+        set_={"score": stmt.excluded.score, "score_value": stmt.excluded.score_value},
+    )
+
+
+def save_scores(conn: Session | Connection, rows: list[dict]) -> int:
+    """
+    Upsert groupé de lignes {user_id, wod, score, score_value, season, box, sex, level}
+    (au plus une ligne par (user_id, wod) ; season = saison du WOD, box = celle de
+    l'athlète), puis un rafraîchissement du classement et du sketch par division touchée
+    et une seule incrémentation de data_version.
+    Renvoie le nombre de lignes écrites.
+    """
+    if not rows:
+        return 0
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    columns = ("user_id", "wod", "score", "score_value", "season", "box")
+    conn.execute(
+        _upsert_many_statement(bind.dialect.name),
+        [{c: row[c] for c in columns} for row in rows],
+    )
+    divisions = {(r["wod"], r["sex"], r["level"], r["box"]) for r in rows}
+    for wod, sex, level, box in sorted(divisions):
+        refresh_leaderboard(conn, wod, sex, level, box)
+        rebuild_sketches(conn, wod, sex, level, box)
+        notify_division(conn, wod, sex, level, box)
+    bump_data_version(conn)
+    return len(rows)
+
+
+_PARTITION_EXISTS_SQL = text("SELECT to_regclass(:name) IS NOT NULL")
+_SCORE_COLUMNS = "id, user_id, wod, score, score_value, created_at, season, box"
+
+
+def ensure_season_partition(conn: Session | Connection, season: int) -> None:
+    """
+    Partition 'scores_<saison>' de la table partitionnée (Postgres ; sans effet ailleurs).
+    À créer avec le premier WOD de la saison : tant qu'elle manque, les scores de la
+    saison tombent dans 'scores_default', d'où ils sont déplacés à sa création.
+    """
+    bind = conn.get_bind() if isinstance(conn, Session) else conn
+    if bind.dialect.name != "postgresql":
+        return
+    season = int(season)
+    partition = f"scores_{season}"
+    if conn.execute(_PARTITION_EXISTS_SQL, {"name": partition}).scalar():
+        return
+    # Verrou pris de toute façon par le rattachement : ici dès le départ, pour qu'aucun
+    # score de la saison n'arrive dans 'scores_default' entre le déplacement et le
+    # rattachement (et pour sérialiser deux créations concurrentes)
+    conn.execute(text("LOCK TABLE scores_default IN ACCESS EXCLUSIVE MODE"))
+    if conn.execute(_PARTITION_EXISTS_SQL, {"name": partition}).scalar():
+        return
+    # CREATE TABLE ... PARTITION OF échouerait si 'scores_default' contient déjà des
+    # lignes de la saison : table créée seule, lignes déplacées, puis rattachée (index et
+    # clés étrangères de 'scores' créés sur la partition au rattachement)
+    conn.execute(
+        text(f"CREATE TABLE {partition} (LIKE scores INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+    )
+    conn.execute(
+        text(f"""
+        WITH moved AS (
+            DELETE FROM scores_default WHERE season = :season
+            RETURNING {_SCORE_COLUMNS}
+        )
+        INSERT INTO {partition} ({_SCORE_COLUMNS}) SELECT {_SCORE_COLUMNS} FROM moved
+    """),
+        {"season": season},
+    )
+    conn.execute(text(f"ALTER TABLE scores ATTACH PARTITION {partition} FOR VALUES IN ({season})"))
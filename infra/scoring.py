@@ -0,0 +1,71 @@
+# infra/scoring.py
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Formats acceptés :
+#   'time' : 'MM:SS', 'H:MM:SS' ou 'CAP:XX' (XX = 1 s par rep manquante => timecap + XX)
+#   'reps' : entier
+_CAP_RE = re.compile(r"^CAP:(\d{1,3})$")
+_TIME_RE = re.compile(r"^(?:(\d+):)?(\d+):(\d+)$")
+_REPS_RE = re.compile(r"^\d+$")
+
+# Version colonne : un seul passage regex (RE2 via pyarrow), groupes nommés
+_SCORE_PATTERN = r"^(?:CAP:(?P<cap>\d{1,3})|(?:(?P<h>\d+):)?(?P<m>\d+):(?P<s>\d+)|(?P<reps>\d+))$"
+_SCORE_FIELDS = ("cap", "h", "m", "s", "reps")
+
+
+def parse_score(value: str | None, wod_type: str | None, timecap: int | None) -> int | None:
+    """
+    Convertit un score brut en valeur numérique (clé de tri) :
+    - 'time' : secondes, 'CAP:XX' => timecap + XX
+    - 'reps' : nombre de répétitions
+    Renvoie None si le format est invalide.
+    """
+    if value is None:
+        return None
+    s = str(value).strip().upper()
+    if not s:
+        return None
+    if wod_type == "time":
+        m = _CAP_RE.match(s)
+        if m:
+            return (timecap or 0) + int(m.group(1))
+        m = _TIME_RE.match(s)
+        if m:
+            hours, minutes, seconds = m.groups()
+            return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+        return None
+    if _REPS_RE.match(s):
+        return int(s)
+    return None
+
+
+def parse_scores(values, wod_types, timecaps) -> np.ndarray:
+    """
+    Version vectorisée de parse_score sur des colonnes entières.
+    `wod_types` / `timecaps` : colonnes de même longueur ou scalaires.
+    Renvoie un tableau float64 (NaN pour les scores invalides).
+    """
+    raw = pa.array(pd.Series(values, dtype=object), type=pa.string(), from_pandas=True)
+    n = len(raw)
+    # Les lignes qui ne matchent pas donnent NULL ; les groupes absents, une chaîne vide
+    matched = pc.extract_regex(pc.utf8_upper(pc.utf8_trim_whitespace(raw)), _SCORE_PATTERN)
+    cap, hours, minutes, seconds, reps = (
+        pc.cast(pc.if_else(pc.equal(field, ""), None, field), pa.float64()).to_numpy(
+            zero_copy_only=False
+        )
+        for field in (pc.struct_field(matched, name) for name in _SCORE_FIELDS)
+    )
+
+    is_time = np.broadcast_to(np.asarray(wod_types, dtype=object) == "time", (n,))
+    caps = pd.to_numeric(pd.Series(np.broadcast_to(timecaps, (n,)))).fillna(0).to_numpy("float64")
+
+    clock = np.nan_to_num(hours) * 3600 + minutes * 60 + seconds
+    time_values = np.where(np.isnan(cap), clock, caps + cap)
+    return np.where(is_time, time_values, reps)
@@ -0,0 +1,200 @@
+# infra/sketches.py
+"""
+Sketches de quantiles persistés par (wod, sex, level, box) dans 'score_sketches'.
+
+Mis à jour à chaque écriture de score (ajout incrémental pour un nouveau score,
+reconstruction de la division si un score est remplacé : un t-digest ne sait pas retirer
+une valeur), reconstructibles depuis 'scores', fusionnables entre divisions ou entre boxes.
+
+CLI : python -m infra.sketches --rebuild
+      python -m infra.sketches --export box.json
+      python -m infra.sketches --merge box1.json box2.json [--wod 26.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+from collections import defaultdict
+from itertools import groupby
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.db import get_session
+from infra.models import DEFAULT_BOX
+from infra.quantiles import QuantileSketch
+
+Division = tuple[str, str, str, str]  # (wod, sex, level, box)
+
+# Filtres NULL = tout (reconstruction complète, d'un WOD ou d'une division). Pour un WOD,
+# sa saison (sous-requête scalaire, évaluée avant le parcours) limite 'scores' à une
+# partition.
+_VALUES_SQL = text("""
+    SELECT s.wod, u.sex, u.level, s.box, s.score_value, w.timecap_seconds
+    FROM scores s
+    JOIN users u ON u.id = s.user_id
+    JOIN wods w ON w.wod = s.wod
+    WHERE s.score_value IS NOT NULL
+      AND (:wod IS NULL
+           OR (s.wod = :wod AND s.season = (SELECT season FROM wods WHERE wod = :wod)))
+      AND (:box IS NULL OR s.box = :box)
+      AND (:sex IS NULL OR u.sex = :sex)
+      AND (:level IS NULL OR u.level = :level)
+    ORDER BY s.wod, u.sex, u.level, s.box
+""")
+
+_DELETE_SQL = text("""
+    DELETE FROM score_sketches
+    WHERE (:wod IS NULL OR wod = :wod)
+      AND (:box IS NULL OR box = :box)
+      AND (:sex IS NULL OR sex = :sex)
+      AND (:level IS NULL OR level = :level)
+""")
+
+_UPSERT_SQL = text("""
+    INSERT INTO score_sketches (wod, sex, level, box, sketch, count, before_cap, updated_at)
+    VALUES (:wod, :sex, :level, :box, :sketch, :count, :before_cap, CURRENT_TIMESTAMP)
+    ON CONFLICT (wod, sex, level, box)
+    DO UPDATE SET sketch = excluded.sketch, count = excluded.count,
+                  before_cap = excluded.before_cap, updated_at = excluded.updated_at
+""")
+
+_SELECT_SQL = text("""
+    SELECT k.sketch, k.before_cap, w.timecap_seconds
+    FROM wods w
+    LEFT JOIN score_sketches k
+      ON k.wod = w.wod AND k.sex = :sex AND k.level = :level AND k.box = :box
+    WHERE w.wod = :wod
+""")
+
+_LOAD_SQL = text("""
+    SELECT wod, sex, level, box, sketch FROM score_sketches
+    WHERE (:wod IS NULL OR wod = :wod) AND (:box IS NULL OR box = :box)
+""")
+
+
+def _params(division: Division, sketch: QuantileSketch, before_cap: int) -> dict:
+    wod, sex, level, box = division
+    return {
+        "wod": wod,
+        "sex": sex,
+        "level": level,
+        "box": box,
+        "sketch": sketch.to_bytes(),
+        "count": sketch.count,
+        "before_cap": before_cap,
+    }
+
+
+def _before_cap(values: list[int], timecap: int | None) -> int:
+    return sum(1 for v in values if v < timecap) if timecap else 0
+
+
+def rebuild_sketches(
+    conn: Session | Connection,
+    wod: str | None = None,
+    sex: str | None = None,
+    level: str | None = None,
+    box: str | None = None,
+) -> int:
+    """Reconstruit depuis 'scores' les sketches filtrés (sans argument : tous)."""
+    filters = {"wod": wod, "sex": sex, "level": level, "box": box}
+    rows = conn.execute(_VALUES_SQL, filters).all()
+    conn.execute(_DELETE_SQL, filters)
+    params = []
+    for division, group in groupby(rows, key=lambda r: r[:4]):
+        group = list(group)
+        values = [r[4] for r in group]
+        params.append(
+            _params(division, QuantileSketch.from_values(values), _before_cap(values, group[0][5]))
+        )
+    if params:
+        conn.execute(_UPSERT_SQL, params)
+    return len(params)
+
+
+def add_to_sketch(conn: Session | Connection, division: Division, value: int) -> None:
+    """
+    Ajout incrémental d'un nouveau score au sketch de sa division (lecture-modification-
+    écriture : l'appelant tient le verrou de division, cf. infra.scores.save_score).
+    """
+    wod, sex, level, box = division
+    blob, before_cap, timecap = conn.execute(
+        _SELECT_SQL, {"wod": wod, "sex": sex, "level": level, "box": box}
+    ).one()
+    sketch = QuantileSketch.from_bytes(blob) if blob is not None else QuantileSketch()
+    sketch.add(value)
+    before_cap = (before_cap or 0) + _before_cap([value], timecap)
+    conn.execute(_UPSERT_SQL, _params(division, sketch, before_cap))
+
+
+def load_sketches(wod: str | None = None, box: str | None = None) -> dict[Division, QuantileSketch]:
+    """Sketches persistés (d'un WOD, d'une box, ou tous) : quelques Ko, quel que soit le volume."""
+    with get_session(readonly=True) as s:
+        rows = s.execute(_LOAD_SQL, {"wod": wod, "box": box}).all()
+    return {(w, sx, lvl, bx): QuantileSketch.from_bytes(blob) for w, sx, lvl, bx, blob in rows}
+
+
+def merge_by(
+    sketches: dict[Division, QuantileSketch], key=lambda division: division
+) -> dict[tuple, QuantileSketch]:
+    """Fusionne les sketches de même clé (ex. key=(wod, sex) : tous niveaux confondus)."""
+    groups: dict[tuple, list[QuantileSketch]] = defaultdict(list)
+    for division, sketch in sketches.items():
+        groups[key(division)].append(sketch)
+    return {k: group[0].merge(*group[1:]) for k, group in groups.items()}
+
+
+def dump_sketches(sketches: dict[Division, QuantileSketch]) -> str:
+    """JSON portable (échange entre boxes) : {"wod|sex|level|box": base64}."""
+    return json.dumps(
+        {"|".join(d): base64.b64encode(k.to_bytes()).decode("ascii") for d, k in sketches.items()},
+        indent=1,
+    )
+
+
+def parse_sketches(payload: str) -> dict[Division, QuantileSketch]:
+    sketches: dict[Division, QuantileSketch] = {}
+    for key, blob in json.loads(payload).items():
+        division = key.split("|")
+        if len(division) == 3:  # export antérieur aux boxes : "wod|sex|level"
+            division.append(DEFAULT_BOX)
+        sketches[tuple(division)] = QuantileSketch.from_bytes(base64.b64decode(blob))
+    return sketches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sketches de quantiles par WOD et division.")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--rebuild", action="store_true", help="reconstruit depuis 'scores'")
+    action.add_argument("--export", metavar="FICHIER", help="exporte les sketches (JSON)")
+    action.add_argument("--merge", nargs="+", metavar="FICHIER", help="vue régionale fusionnée")
+    parser.add_argument("--wod", help="limite à un WOD")
+    parser.add_argument("--box", help="limite à une box (--rebuild, --export)")
+    args = parser.parse_args()
+    from infra.stats import DECILES
+
+    if args.rebuild:
+        with get_session() as s:
+            print(f"{rebuild_sketches(s, args.wod, box=args.box)} sketches reconstruits")
+    elif args.export:
+        with open(args.export, "w", encoding="utf-8") as f:
+            f.write(dump_sketches(load_sketches(args.wod, args.box)))
+    else:
+        sketches: dict[Division, QuantileSketch] = {}
+        for path in args.merge:
+            with open(path, encoding="utf-8") as f:
+                for division, sketch in parse_sketches(f.read()).items():
+                    if args.wod is None or division[0] == args.wod:
+                        previous = sketches.get(division)
+                        sketches[division] = previous.merge(sketch) if previous else sketch
+        for (wod, sex), sketch in sorted(merge_by(sketches, lambda d: d[:2]).items()):
+            deciles = ", ".join(f"{v:.0f}" for v in sketch.quantiles(DECILES))
+            print(f"{wod} {sex} (n={sketch.count}) : {deciles}")
+
+
+if __name__ == "__main__":
+    main()
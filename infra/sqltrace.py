@@ -0,0 +1,147 @@
+# infra/sqltrace.py
+"""
+Instrumentation SQL opt-in (database.sql_trace = true / DB_SQL_TRACE=1).
+
+Hooks before/after_cursor_execute posés sur les engines par infra.db : chaque requête est
+enregistrée (page, durée, lignes, engine) dans la trace du rerun courant (ContextVar :
+suivie dans asyncio.to_thread et dans les coroutines lancées par run_async), signalée si la
+même requête revient plusieurs fois dans le rerun (N+1) et ajoutée au journal JSONL
+(database.sql_trace_log, défaut sql_trace.jsonl). Le panneau de debug (barre latérale) est
+affiché une fois, en fin de page (end_page).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import streamlit as st  # type: ignore
+    from streamlit.runtime.scriptrunner import get_script_run_ctx  # type: ignore
+except Exception:  # pragma: no cover
+    st = None  # type: ignore
+    get_script_run_ctx = None  # type: ignore
+
+_TRACE: contextvars.ContextVar[PageTrace | None] = contextvars.ContextVar(
+    "sqltrace_page", default=None
+)
+_LOG_LOCK = threading.Lock()
+_WS_RE = re.compile(r"\s+")
+
+
+def _setting(name: str, default: str | None = None) -> str | None:
+    from infra.db import db_setting
+
+    return db_setting(name, default)
+
+
+def enabled() -> bool:
+    return (_setting("sql_trace") or "").lower() in ("1", "true", "yes", "on")
+
+
+class PageTrace:
+    """Requêtes d'un rerun de page."""
+
+    def __init__(self, page: str, placeholder: Any = None):
+        self.page = page
+        self.run_id = uuid.uuid4().hex[:12]
+        self.statements: list[dict] = []
+        self.counts: Counter[str] = Counter()
+        self.placeholder = placeholder
+        self._lock = threading.Lock()  # lectures concurrentes (to_thread, engine asyncio)
+
+    def record(self, entry: dict) -> None:
+        with self._lock:
+            self.counts[entry["statement"]] += 1
+            entry["repeat"] = self.counts[entry["statement"]]
+            self.statements.append(entry)
+
+    def repeated(self) -> list[tuple[str, int]]:
+        """Requêtes identiques exécutées plusieurs fois dans le rerun (suspicion N+1)."""
+        return [(sql, n) for sql, n in self.counts.most_common() if n > 1]
+
+    def total_ms(self) -> float:
+        return sum(e["duration_ms"] for e in self.statements)
+
+
+def begin_page(page: str) -> None:
+    """À appeler en tête de page : démarre la trace du rerun (no-op si désactivé)."""
+    if not enabled():
+        _TRACE.set(None)
+        return
+    placeholder = st.sidebar.empty() if st is not None else None
+    _TRACE.set(PageTrace(page, placeholder))
+
+
+def current_trace() -> PageTrace | None:
+    return _TRACE.get()
+
+
+def end_page() -> None:
+    """À appeler en fin de page et avant st.stop() : affiche le panneau de debug du rerun."""
+    trace = current_trace()
+    if trace is not None:
+        _render(trace)
+
+
+def _log_path() -> str:
+    return _setting("sql_trace_log", "sql_trace.jsonl") or "sql_trace.jsonl"
+
+
+def _write_jsonl(entry: dict) -> None:
+    with _LOG_LOCK, open(_log_path(), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _render(trace: PageTrace) -> None:
+    if trace.placeholder is None or get_script_run_ctx is None or get_script_run_ctx() is None:
+        return
+    with trace.placeholder.container(), st.expander("SQL (debug)"):
+        st.caption(f"{len(trace.statements)} requêtes — {trace.total_ms():.1f} ms")
+        for sql, n in trace.repeated():
+            st.warning(f"Requête répétée {n}× dans ce rerun : {sql[:160]}")
+        st.dataframe(
+            [
+                {
+                    "ms": round(e["duration_ms"], 2),
+                    "lignes": e["rows"],
+                    "engine": e["engine"],
+                    "requête": e["statement"][:200],
+                }
+                for e in trace.statements
+            ]
+        )
+
+
+def install(engine: Engine, role: str) -> None:
+    """Pose les hooks de mesure sur `engine` (role : 'write' | 'read' | 'async')."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._sqltrace_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        trace = current_trace()
+        if trace is None:
+            return
+        entry = {
+            "ts": time.time(),
+            "page": trace.page,
+            "run_id": trace.run_id,
+            "engine": role,
+            "statement": _WS_RE.sub(" ", statement).strip(),
+            "duration_ms": (time.perf_counter() - context._sqltrace_start) * 1000,
+            "rows": cursor.rowcount,
+        }
+        trace.record(entry)
+        _write_jsonl(entry)
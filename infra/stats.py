@@ -0,0 +1,178 @@
+# infra/stats.py
+from __future__ import annotations
+
+from collections import Counter
+
+import numpy as np
+from sqlalchemy import text
+
+from infra.db import fetch_all, get_session
+from infra.quantiles import QuantileSketch
+from infra.sketches import merge_by
+
+DECILES = [i / 10 for i in range(11)]
+
+# Agrégats d'un seul WOD calculés côté Postgres sur score_value :
+# - GROUPING SETS (sex) : déciles, moyenne, effectif, arrivées avant le cap
+# - GROUPING SETS (sex, level) : nombre de participants
+# Scores invalides (score_value NULL) exclus, comme dans les sketches (infra.sketches) :
+# mêmes effectifs et participants que wod_statistics.
+_WOD_STATS_SQL = text("""
+    SELECT u.sex,
+           u.level,
+           GROUPING(u.level) AS by_sex,
+           percentile_cont(CAST(:deciles AS double precision[]))
+               WITHIN GROUP (ORDER BY s.score_value) AS deciles,
+           avg(s.score_value) AS mean,
+           count(s.score_value) AS scored,
+           count(*) FILTER (WHERE s.score_value < w.timecap_seconds) AS before_cap,
+           count(*) AS participants,
+           min(w.type) AS wod_type,
+           min(w.timecap_seconds) AS timecap
+    FROM scores s
+    JOIN users u ON u.id = s.user_id
+    JOIN wods w ON w.wod = s.wod
+    WHERE s.wod = :wod AND s.season = (SELECT season FROM wods WHERE wod = :wod)
+      AND s.score_value IS NOT NULL
+      AND (:box IS NULL OR s.box = :box)
+    GROUP BY GROUPING SETS ((u.sex), (u.sex, u.level))
+""")
+
+# Repli hors Postgres (SQLite local : bench, tests) : valeurs du WOD, agrégées en numpy
+_WOD_VALUES_SQL = text("""
+    SELECT u.sex, u.level, s.score_value, w.type, w.timecap_seconds
+    FROM scores s
+    JOIN users u ON u.id = s.user_id
+    JOIN wods w ON w.wod = s.wod
+    WHERE s.wod = :wod AND s.season = (SELECT season FROM wods WHERE wod = :wod)
+      AND s.score_value IS NOT NULL
+      AND (:box IS NULL OR s.box = :box)
+""")
+
+# s.season = w.season : chaque sous-requête ne sonde que la partition de la saison du WOD
+_SCORED_WODS_SQL = text("""
+    SELECT w.wod FROM wods w
+    WHERE EXISTS (
+        SELECT 1 FROM scores s
+        WHERE s.season = w.season AND s.wod = w.wod AND (:box IS NULL OR s.box = :box)
+    )
+    ORDER BY w.season DESC, w.wod
+""")
+
+
+def scored_wods(box: str | None = None) -> list[str]:
+    """WODs ayant au moins un score (dans la box, None : toutes), saison récente d'abord."""
+    with get_session(readonly=True) as s:
+        return list(s.execute(_SCORED_WODS_SQL, {"box": box}).scalars())
+
+
+_WOD_SKETCHES_SQL = text("""
+    SELECT k.sex, k.level, k.box, k.sketch, k.before_cap, w.type, w.timecap_seconds
+    FROM score_sketches k
+    JOIN wods w ON w.wod = k.wod
+    WHERE k.wod = :wod AND (:box IS NULL OR k.box = :box)
+""")
+
+
+def wod_statistics(wod: str, box: str | None = None) -> dict | None:
+    """
+    Statistiques d'un WOD lues dans les sketches de quantiles (score_sketches) : coût
+    constant, sans parcourir 'scores'. Déciles et moyennes approchés (centroïdes float32) ;
+    effectifs et arrivées avant le cap exacts (scores valides). Même format que
+    wod_statistics_exact. box=None : toutes les boxes (sketches fusionnés).
+    """
+    with get_session(readonly=True) as s:
+        rows = s.execute(_WOD_SKETCHES_SQL, {"wod": wod, "box": box}).all()
+    return _sketch_statistics(wod, rows)
+
+
+async def wod_statistics_async(wod: str, box: str | None = None) -> dict | None:
+    """Variante asynchrone de wod_statistics (cf. infra.cache.cached_gather)."""
+    return _sketch_statistics(wod, await fetch_all(_WOD_SKETCHES_SQL, {"wod": wod, "box": box}))
+
+
+def _sketch_statistics(wod: str, rows: list) -> dict | None:
+    if not rows:
+        return None
+
+    wod_type, timecap = rows[0][5], rows[0][6]
+    sketches = {
+        (wod, sex, level, bx): QuantileSketch.from_bytes(blob) for sex, level, bx, blob, *_ in rows
+    }
+    before_cap = Counter()
+    participants = Counter()
+    for sex, _, _, _, n, *_ in rows:
+        before_cap[sex] += n
+    for (_, sex, level, _), sketch in sketches.items():
+        participants[(sex, level)] += sketch.count
+    result: dict = {"type": wod_type, "timecap": timecap, "by_sex": {}, "participants": []}
+    # Niveaux (et boxes) fusionnés : un sketch par sexe
+    for (_, sex), sketch in merge_by(sketches, lambda d: d[:2]).items():
+        result["by_sex"][sex] = {
+            "deciles": sketch.quantiles(DECILES),
+            "mean": sketch.mean(),
+            "scored": sketch.count,
+            "before_cap": before_cap[sex],
+        }
+    result["participants"] = [(sex, level, n) for (sex, level), n in participants.items()]
+    return result
+
+
+def wod_statistics_exact(wod: str, box: str | None = None) -> dict | None:
+    """
+    Statistiques exactes d'un WOD (parcours des scores du WOD, agrégé côté Postgres) :
+    {'type', 'timecap',
+     'by_sex': {sex: {'deciles': [11 valeurs, 0→100 %], 'mean', 'scored', 'before_cap'}},
+     'participants': [(sex, level, nombre)]}
+    Seuls les scores valides (score_value non NULL) sont comptés, comme dans les sketches.
+    None si le WOD n'a aucun score valide.
+    """
+    with get_session(readonly=True) as s:
+        if s.get_bind().dialect.name != "postgresql":
+            params = {"wod": wod, "box": box}
+            return _wod_statistics_portable(s.execute(_WOD_VALUES_SQL, params).all())
+        rows = (
+            s.execute(_WOD_STATS_SQL, {"wod": wod, "box": box, "deciles": DECILES}).mappings().all()
+        )
+    if not rows:
+        return None
+
+    result: dict = {
+        "type": rows[0]["wod_type"],
+        "timecap": rows[0]["timecap"],
+        "by_sex": {},
+        "participants": [],
+    }
+    for r in rows:
+        if r["by_sex"]:
+            result["by_sex"][r["sex"]] = {
+                "deciles": [float(v) for v in r["deciles"]] if r["deciles"] else None,
+                "mean": float(r["mean"]) if r["mean"] is not None else None,
+                "scored": int(r["scored"]),
+                "before_cap": int(r["before_cap"]),
+            }
+        else:
+            result["participants"].append((r["sex"], r["level"], int(r["participants"])))
+    return result
+
+
+def _wod_statistics_portable(rows: list) -> dict | None:
+    if not rows:
+        return None
+    _, _, _, wod_type, timecap = rows[0]
+    result: dict = {"type": wod_type, "timecap": timecap, "by_sex": {}, "participants": []}
+    by_sex: dict[str, list[float]] = {}
+    participants: Counter[tuple[str, str]] = Counter()
+    for sex, level, value, _, _ in rows:
+        participants[(sex, level)] += 1
+        by_sex.setdefault(sex, []).append(float(value))
+    for sex, values in by_sex.items():
+        arr = np.asarray(values)
+        result["by_sex"][sex] = {
+            "deciles": np.percentile(arr, np.asarray(DECILES) * 100).tolist() if arr.size else None,
+            "mean": float(arr.mean()) if arr.size else None,
+            "scored": int(arr.size),
+            "before_cap": int((arr < timecap).sum()) if timecap else 0,
+        }
+    result["participants"] = [(sex, level, n) for (sex, level), n in participants.items()]
+    return result
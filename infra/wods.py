@@ -0,0 +1,203 @@
+# infra/wods.py
+"""
+Catalogue des WODs en mémoire du processus (table 'wods').
+
+Chargé une fois, figé (MappingProxyType de WodInfo), puis rechargé seulement quand la
+version du catalogue (ligne id=2 de 'data_version') change : cette version est relue au
+plus toutes les CHECK_INTERVAL_SECONDS, les lectures entre deux vérifications ne touchent
+pas la base. Ajouter un WOD ou une saison = une ligne dans 'wods' (save_wod / CLI), sans
+modifier les pages ; chaque WOD appartient à une saison et, s'il n'est pas officiel, à une
+box.
+
+CLI : python -m infra.wods                                 liste le catalogue
+      python -m infra.wods --add 26.4 "Open 26.4" time --timecap 900 [--season 2026]
+                           [--box ma-box]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import threading
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import NamedTuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from infra.cache import bump_data_version
+from infra.db import get_session
+from infra.models import score_sort_desc
+from infra.scores import ensure_season_partition
+
+CATALOG_VERSION_ID = 2  # ligne de 'data_version' dédiée au catalogue
+CHECK_INTERVAL_SECONDS = 30.0
+WOD_TYPES = ("time", "reps")
+
+_VERSION_SQL = text("SELECT version FROM data_version WHERE id = :id")
+_WODS_SQL = text("SELECT wod, label, type, timecap_seconds, season, box FROM wods")
+_SAVE_SQL = text("""
+    INSERT INTO wods (wod, label, type, timecap_seconds, season, box)
+    VALUES (:wod, :label, :type, :timecap_seconds, :season, :box)
+    ON CONFLICT (wod) DO UPDATE SET
+        label = excluded.label,
+        type = excluded.type,
+        timecap_seconds = excluded.timecap_seconds,
+        box = excluded.box
+""")
+_BUMP_SQL = text("UPDATE data_version SET version = version + 1 WHERE id = :id")
+
+
+class WodInfo(NamedTuple):
+    wod: str
+    label: str
+    type: str  # 'time' | 'reps'
+    timecap_seconds: int | None
+    season: int
+    box: str | None  # None = WOD officiel, commun à toutes les boxes
+
+    @property
+    def sort_desc(self) -> bool:
+        return score_sort_desc(self.type)
+
+
+def season_of_code(wod: str) -> int:
+    """Saison déduite du code Open ('26.1' -> 2026) ; année courante à défaut."""
+    prefix = wod.split(".", 1)[0]
+    return 2000 + int(prefix) if prefix.isdigit() and len(prefix) == 2 else time.localtime().tm_year
+
+
+def _wod_key(wod: str) -> tuple:
+    # Ordre naturel : '26.2' avant '26.10'
+    return tuple(int(p) if p.isdigit() else p for p in re.split(r"(\d+)", wod))
+
+
+class _Catalog:
+    def __init__(self):
+        self.version: int | None = None
+        self.checked_at = float("-inf")
+        self.wods: Mapping[str, WodInfo] = MappingProxyType({})
+        self._lock = threading.Lock()
+
+    def get(self) -> Mapping[str, WodInfo]:
+        if time.monotonic() - self.checked_at < CHECK_INTERVAL_SECONDS:
+            return self.wods
+        with self._lock:
+            if time.monotonic() - self.checked_at < CHECK_INTERVAL_SECONDS:
+                return self.wods
+            with get_session(readonly=True) as s:
+                version = s.execute(_VERSION_SQL, {"id": CATALOG_VERSION_ID}).scalar() or 0
+                if version != self.version:
+                    rows = sorted(
+                        (WodInfo(*row) for row in s.execute(_WODS_SQL)),
+                        key=lambda w: _wod_key(w.wod),
+                    )
+                    self.wods = MappingProxyType({w.wod: w for w in rows})
+                    self.version = version
+            self.checked_at = time.monotonic()
+            return self.wods
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self.version = None
+            self.checked_at = float("-inf")
+
+
+_CATALOG = _Catalog()
+
+
+def wod_catalog() -> Mapping[str, WodInfo]:
+    """Catalogue figé {wod: WodInfo}, en ordre naturel des codes ; ne pas le modifier."""
+    return _CATALOG.get()
+
+
+def wod_codes(season: int | None = None, box: str | None = None) -> list[str]:
+    """Codes des WODs d'une saison (None : toutes) visibles par une box (officiels + les siens)."""
+    return [
+        w.wod
+        for w in wod_catalog().values()
+        if (season is None or w.season == season) and (w.box is None or w.box == box)
+    ]
+
+
+def seasons() -> list[int]:
+    """Saisons du catalogue, la plus récente d'abord."""
+    return sorted({w.season for w in wod_catalog().values()}, reverse=True)
+
+
+def current_season() -> int | None:
+    return max((w.season for w in wod_catalog().values()), default=None)
+
+
+def get_wod(wod: str) -> WodInfo | None:
+    return wod_catalog().get(wod)
+
+
+def invalidate_catalog() -> None:
+    """Force le rechargement à la prochaine lecture (processus courant uniquement)."""
+    _CATALOG.invalidate()
+
+
+def bump_catalog_version(conn: Session | Connection) -> None:
+    """À appeler dans la transaction qui modifie 'wods' : les autres processus rechargent."""
+    conn.execute(_BUMP_SQL, {"id": CATALOG_VERSION_ID})
+
+
+def save_wod(
+    conn: Session | Connection,
+    wod: str,
+    label: str,
+    wod_type: str,
+    timecap_seconds: int | None = None,
+    season: int | None = None,
+    box: str | None = None,
+) -> None:
+    """
+    Crée ou met à jour un WOD (saison par défaut : déduite du code ; la saison d'un WOD
+    existant ne change pas, ses scores sont rangés dans la partition de cette saison) et
+    incrémente la version du catalogue (et celle des données : les résultats en cache
+    dépendent des WODs affichés). Crée la partition de la saison si besoin (Postgres).
+    """
+    if wod_type not in WOD_TYPES:
+        raise ValueError(f"Type de WOD inconnu : '{wod_type}' (attendu : {', '.join(WOD_TYPES)})")
+    season = season or season_of_code(wod)
+    ensure_season_partition(conn, season)
+    conn.execute(
+        _SAVE_SQL,
+        {
+            "wod": wod,
+            "label": label,
+            "type": wod_type,
+            "timecap_seconds": timecap_seconds,
+            "season": season,
+            "box": box,
+        },
+    )
+    bump_catalog_version(conn)
+    bump_data_version(conn)
+    invalidate_catalog()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Catalogue des WODs.")
+    parser.add_argument("--add", nargs=3, metavar=("WOD", "LABEL", "TYPE"))
+    parser.add_argument("--timecap", type=int, help="cap en secondes (WOD au temps)")
+    parser.add_argument("--season", type=int, help="défaut : déduite du code (26.x -> 2026)")
+    parser.add_argument("--box", help="WOD propre à une box (défaut : officiel)")
+    args = parser.parse_args()
+
+    if args.add:
+        wod, label, wod_type = args.add
+        with get_session() as s:
+            save_wod(s, wod, label, wod_type, args.timecap, args.season, args.box)
+    for w in wod_catalog().values():
+        cap = f" cap {w.timecap_seconds} s" if w.timecap_seconds else ""
+        box = f" [{w.box}]" if w.box else ""
+        print(f"{w.season} {w.wod:<8} {w.type:<5} {w.label}{cap}{box}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,57 +1,21 @@
 from datetime import datetime
 
 import streamlit as st
-from sqlalchemy import (
-    TIMESTAMP,
-    Column,
-    ForeignKey,
-    Integer,
-    String,
-    func,
-)
-from sqlalchemy.orm import declarative_base, relationship
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from infra.db import bootstrap_after_create, get_engine, get_session
-
-Base = declarative_base()
-
-
-class User(Base):
-    __tablename__ = "users"
-    id = Column(Integer, primary_key=True)
-    name = Column(String(255), nullable=False)
-    email = Column(String(255), unique=True, nullable=False)
-    password = Column(String(255), nullable=False)
-    sex = Column(String(10), nullable=False)
-    birth_year = Column(Integer, nullable=False)
-    level = Column(String(10), nullable=False)
-    category = Column(String(20), nullable=False)
-    age = Column(Integer, nullable=False)
-    scores = relationship("Score", back_populates="user", cascade="all, delete")
-
-
-class Score(Base):
-    __tablename__ = "scores"
-    id = Column(Integer, primary_key=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    wod = Column(String(10), nullable=False)  # '26.1' etc.
-    score = Column(String(20), nullable=False)  # 'MM:SS' ou répétitions
-    created_at = Column(TIMESTAMP, server_default=func.now())
-    user = relationship("User", back_populates="scores")
-
-
-class Wod(Base):
-    __tablename__ = "wods"
-    wod = Column(String(10), primary_key=True)  # '26.1'
-    label = Column(String(100), nullable=False)
-    type = Column(String(10), nullable=False)  # 'time' | 'reps'
-    timecap_seconds = Column(Integer, nullable=True)  # cap en secondes
-
+from infra import sqltrace
+from infra.auth import (
+    current_box,
+    current_user,
+    logout,
+    refresh_current_user,
+    set_current_user,
+)
+from infra.cache import bump_data_version
+from infra.db import get_session
+from infra.models import User
 
-# Création des tables puis bootstrap auto (seed + index)
-Base.metadata.create_all(get_engine())
-bootstrap_after_create()
+sqltrace.begin_page("Authentification")
 
 
 def calculate_age_category(birth_year, current_year=datetime.now().year):
@@ -105,17 +69,12 @@ def login():
                                 level=level,
                                 category=category,
                                 age=age,
+                                box=current_box(),  # box du déploiement
                             )
                             session.add(new_user)
-                            st.session_state["user"] = {
-                                "name": name,
-                                "email": email,
-                                "sex": sex,
-                                "birth_year": birth_year,
-                                "level": level,
-                                "category": category,
-                                "age": age,
-                            }
+                            session.flush()  # id attribué : gardé dans le profil de session
+                            bump_data_version(session)
+                            set_current_user(new_user)
                             st.success(
                                 f"Welcome {name}! You are categorized as {category} ({age} years old)."
                             )
@@ -130,50 +89,47 @@ def login():
                 with get_session(readonly=True) as session:
                     user = session.query(User).filter_by(email=email_login).first()
                     if user and check_password_hash(user.password, password_login):
-                        st.session_state["user"] = {
-                            "name": user.name,
-                            "email": user.email,
-                            "sex": user.sex,
-                            "birth_year": user.birth_year,
-                            "level": user.level,
-                            "category": user.category,
-                            "age": user.age,
-                        }
+                        set_current_user(user)
                         st.success(f"Logged in as {user.name}")
                     else:
                         st.error("Invalid email or password. Please try again.")
     else:
         st.subheader(f"Hello {st.session_state['user']['name']}!")
         if st.button("Logout"):
-            st.session_state["user"] = None
+            logout()
             st.success("Logged out successfully.")
 
 
 login()
 
 
-def change_password():
+def change_password(profile):
     st.subheader("Change Password if you want:")
-    with get_session() as session:
-        user = session.query(User).filter_by(email=st.session_state["user"]["email"]).first()
-        if user:
-            with st.form(key="change_password_form"):
-                old_password = st.text_input("Old Password", type="password")
-                new_password = st.text_input("New Password", type="password")
-                confirm_password = st.text_input("Confirm New Password", type="password")
-                submit_button = st.form_submit_button("Change Password")
-
-                if submit_button:
-                    if not old_password or not new_password or not confirm_password:
-                        st.error("All fields are required.")
-                    elif not check_password_hash(user.password, old_password):
+    with st.form(key="change_password_form"):
+        old_password = st.text_input("Old Password", type="password")
+        new_password = st.text_input("New Password", type="password")
+        confirm_password = st.text_input("Confirm New Password", type="password")
+        submit_button = st.form_submit_button("Change Password")
+
+        if submit_button:
+            if not old_password or not new_password or not confirm_password:
+                st.error("All fields are required.")
+            elif new_password != confirm_password:
+                st.error("New passwords do not match.")
+            else:
+                # Lecture du hash uniquement à la soumission, par clé primaire
+                with get_session() as session:
+                    user = session.get(User, profile["id"])
+                    if user is None or not check_password_hash(user.password, old_password):
                         st.error("Incorrect old password.")
-                    elif new_password != confirm_password:
-                        st.error("New passwords do not match.")
-                    else:
-                        user.password = generate_password_hash(new_password, method="pbkdf2:sha256")
-                        st.success("Your password has been updated successfully!")
+                        return
+                    user.password = generate_password_hash(new_password, method="pbkdf2:sha256")
+                refresh_current_user()
+                st.success("Your password has been updated successfully!")
+
 
+profile = current_user()
+if profile:
+    change_password(profile)
 
-if st.session_state.get("user"):
-    change_password()
+sqltrace.end_page()
@@ -1,106 +1,184 @@
-import streamlit as st
+import os
+import tempfile
 
-from infra.db import get_session
-from pages.Authentification import Score, User, Wod
+import streamlit as st
 
+from infra import live, sqltrace
+from infra.auth import current_box, current_user
+from infra.cache import cache_stats, cached, cached_gather, prefetch
+from infra.db import db_setting
+from infra.export import FORMATS, export_leaderboard
+from infra.ranking import (
+    PAGE_SIZE,
+    athlete_rank_async,
+    leaderboard_overall_page,
+    leaderboard_overall_page_async,
+    leaderboard_wod_page,
+    leaderboard_wod_page_async,
+)
+from infra.wods import seasons, wod_codes
+
+LIVE_REFRESH_SECONDS = 1.0
+
+sqltrace.begin_page("Classement")
 st.title("Classement des Athlètes")
 
-sex_selected = st.selectbox("Sexe", ["Male", "Female"], index=0)
-level_selected = st.selectbox("Niveau", ["RX", "Scaled", "Coach"], index=0)
-wod_selected = st.selectbox("Choisissez le WOD", ["Overall", "26.1", "26.2", "26.3"])
-
-
-def _score_to_seconds(score_str: str) -> int | None:
-    try:
-        parts = list(map(int, score_str.split(":")))
-        if len(parts) == 2:
-            return parts[0] * 60 + parts[1]
-        elif len(parts) == 3:
-            return parts[0] * 3600 + parts[1] * 60 + parts[2]
-    except Exception:
-        return None
-    return None
+leaderboard_overall_page = cached("classement")(leaderboard_overall_page)
+leaderboard_wod_page = cached("classement")(leaderboard_wod_page)
 
+# Classements de la box (celle de l'athlète connecté, sinon celle du déploiement)
+box = current_box()
+season_selected = st.selectbox("Saison", seasons())
 
-def _get_wod(wod: str):
-    with get_session(readonly=True) as s:
-        return s.query(Wod).filter(Wod.wod == wod).first()
-
-
-def calculer_classement(wod: str, sex: str, level: str):
-    with get_session(readonly=True) as s:
-        rows = (
-            s.query(User.name, User.level, User.sex, Score.score)
-            .join(Score, User.id == Score.user_id)
-            .filter(Score.wod == wod, User.sex == sex, User.level == level)
-            .all()
-        )
-
-    if not rows:
-        return {}, {}
-
-    wod_meta = _get_wod(wod)
-    wod_type = wod_meta.type if wod_meta else "reps"
+sex_selected = st.selectbox("Sexe", ["Male", "Female"], index=0)
+level_selected = st.selectbox("Niveau", ["RX", "Scaled", "Coach"], index=0)
+wods_overall = wod_codes(season_selected, box)  # catalogue en mémoire (infra.wods)
+wod_selected = st.selectbox("Choisissez le WOD", ["Overall", *wods_overall])
 
-    classement, raw_scores = {}, {}
-    for name, level, sex, score in rows:
-        raw_scores.setdefault((name, level, sex), {})[wod] = score
-        if wod_type == "time":
-            secs = _score_to_seconds(score)
-            classement.setdefault((level, sex), []).append(
-                (name, secs if secs is not None else 10**9)
-            )
-        else:
-            try:
-                classement.setdefault((level, sex), []).append((name, int(score)))
-            except Exception:
-                classement.setdefault((level, sex), []).append((name, 0))
 
-    for key in classement:
-        if wod_type == "time":
-            classement[key] = sorted(classement[key], key=lambda x: x[1])  # ASC
-        else:
-            classement[key] = sorted(classement[key], key=lambda x: x[1], reverse=True)  # DESC
-    return classement, raw_scores
+PAGE_SIZES = [25, 50, 100, 200]
+default_size = int(db_setting("leaderboard_page_size", str(PAGE_SIZE)) or PAGE_SIZE)
+page_size = st.select_slider(
+    "Athlètes par page",
+    sorted({*PAGE_SIZES, default_size}),
+    value=default_size,
+)
 
+# Pile des curseurs (place, user_id) des pages déjà vues, remise à zéro quand un filtre change
+view = (season_selected, box, wod_selected, sex_selected, level_selected, page_size)
+if st.session_state.get("classement_view") != view:
+    st.session_state["classement_view"] = view
+    st.session_state["classement_cursors"] = [None]
+cursors = st.session_state["classement_cursors"]
 
 if wod_selected == "Overall":
-    general_classement, scores_details = {}, {}
-    for wod in ["26.1", "26.2", "26.3"]:
-        wod_classement, wod_scores = calculer_classement(wod, sex_selected, level_selected)
-        for (level, sex), athletes in wod_classement.items():
-            for i, (name, _) in enumerate(athletes):
-                general_classement.setdefault((name, level, sex), 0)
-                general_classement[(name, level, sex)] += i + 1
-                scores_details.setdefault((name, level, sex), {}).update(
-                    wod_scores.get((name, level, sex), {})
-                )
-
-    sorted_general = sorted(general_classement.items(), key=lambda x: x[1])
-    st.table(
-        {
-            "Place": [i + 1 for i in range(len(sorted_general))],
-            "Nom": [c[0][0] for c in sorted_general],
-            "Niveau": [c[0][1] for c in sorted_general],
-            "Sexe": [c[0][2] for c in sorted_general],
-            "26.1": [scores_details[c[0]].get("26.1", "-") for c in sorted_general],
-            "26.2": [scores_details[c[0]].get("26.2", "-") for c in sorted_general],
-            "26.3": [scores_details[c[0]].get("26.3", "-") for c in sorted_general],
-            "Points Totaux": [c[1] for c in sorted_general],
-        }
-    )
+    fetch_page, fetch_page_async = leaderboard_overall_page, leaderboard_overall_page_async
+    filters = (season_selected, sex_selected, level_selected, box)
 else:
-    classement, scores_details = calculer_classement(wod_selected, sex_selected, level_selected)
-    for (level, sex), athletes in classement.items():
-        st.subheader(f"Classement {level} - {sex}")
-        sorted_classement = [
-            (name, scores_details[(name, level, sex)][wod_selected]) for name, _ in athletes
-        ]
-        st.table(
-            {
-                "Place": [i + 1 for i in range(len(sorted_classement))],
-                "Nom": [c[0] for c in sorted_classement],
-                "Score": [c[1] for c in sorted_classement],
-                "Points": [i + 1 for i in range(len(sorted_classement))],
+    fetch_page, fetch_page_async = leaderboard_wod_page, leaderboard_wod_page_async
+    filters = (wod_selected, season_selected, sex_selected, level_selected, box)
+
+# Page du classement et position de l'athlète connecté (sans parcourir le classement) :
+# lectures indépendantes, lancées ensemble
+user = current_user()
+calls = [(fetch_page_async, (*filters, cursors[-1], page_size))]
+# Divisions dont dépend l'affichage : notifiées à chaque score enregistré (infra.live)
+watched = [(w, sex_selected, level_selected, box) for w in wods_overall]
+if wod_selected != "Overall":
+    watched = [(wod_selected, sex_selected, level_selected, box)]
+if user and season_selected is not None:
+    calls.append((athlete_rank_async, (user["id"], season_selected, user["sex"], user["level"])))
+    watched += [(w, user["sex"], user["level"], box) for w in wods_overall]
+st.session_state["classement_full_run"] = True
+
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS if live.enabled() else None)
+def leaderboard_view() -> None:
+    # Rerun complet (filtres, pagination) : lecture habituelle (cache + data_version).
+    # Rerun périodique du fragment : relecture seulement si une division affichée a reçu
+    # un score, sinon réaffichage sans requête
+    full_run = st.session_state.pop("classement_full_run", False)
+    key = (view, cursors[-1], live.division_versions(watched))
+    if full_run or st.session_state.get("classement_live_key") != key:
+        st.session_state["classement_data"] = cached_gather("classement", *calls)
+        st.session_state["classement_live_key"] = key
+        next_cursor = st.session_state["classement_data"][0]["next"]
+        if next_cursor is not None:
+            # Page suivante chargée en arrière-plan : le clic sur "Suivant" la lit en cache
+            prefetch(fetch_page, *filters, next_cursor, page_size)
+    page, *rank = st.session_state["classement_data"]
+
+    if rank:
+        ranks = rank[0]
+        with st.expander(f"Mon classement ({user['sex']} - {user['level']})", expanded=True):
+            if not ranks:
+                st.caption("Aucun score enregistré pour l'instant.")
+            else:
+                wods_ranked = sorted(w for w in ranks if w != "Overall")
+                if "Overall" in ranks:
+                    wods_ranked.append("Overall")
+                for col, wod in zip(st.columns(len(wods_ranked)), wods_ranked, strict=True):
+                    r = ranks[wod]
+                    col.metric(
+                        wod,
+                        f"{r['place']} / {r['total']}",
+                        f"Top {r['top_percent']:.0f} %",
+                        delta_color="off",
+                        help=f"Score : {r['score']}" if r["score"] else f"Points : {r['points']}",
+                    )
+
+    if wod_selected == "Overall":
+        general = page["rows"]
+        table = {
+            "Place": [a["place"] for a in general],
+            "Nom": [a["name"] for a in general],
+            "Niveau": [a["level"] for a in general],
+            "Sexe": [a["sex"] for a in general],
+        }
+        for wod in wods_overall:
+            table[wod] = [a["scores"].get(wod, "-") for a in general]
+        table["Points Totaux"] = [a["points"] for a in general]
+        st.table(table)
+    else:
+        classement = page["rows"]
+        if classement:
+            st.subheader(f"Classement {level_selected} - {sex_selected}")
+            st.table(
+                {
+                    "Place": [c["place"] for c in classement],
+                    "Nom": [c["name"] for c in classement],
+                    "Score": [c["score"] for c in classement],
+                    "Points": [c["points"] for c in classement],
+                }
+            )
+
+    col_prev, col_page, col_next = st.columns([1, 2, 1])
+    if col_prev.button("◀ Précédent", disabled=len(cursors) == 1):
+        cursors.pop()
+        st.rerun()
+    col_page.caption(f"Page {len(cursors)}")
+    if col_next.button("Suivant ▶", disabled=page["next"] is None):
+        cursors.append(page["next"])
+        st.rerun()
+
+
+leaderboard_view()
+
+# Export (streaming DB -> fichier temporaire, par blocs). st.download_button garde le fichier
+# entier en mémoire (Streamlit 1.42 : pas de source paresseuse ni de service depuis le disque) :
+# export plafonné à database.export_max_rows lignes, export complet via la CLI infra.export.
+EXPORT_MAX_ROWS = int(db_setting("export_max_rows", "100000") or 100000)
+
+with st.expander("Exporter les résultats"):
+    export_format = st.radio("Format", FORMATS, horizontal=True)
+    export_all = st.checkbox("Toutes les saisons, divisions et WODs de la box (Overall inclus)")
+    if st.button("Préparer l'export"):
+        filters = (
+            {"box": box}
+            if export_all
+            else {
+                "wod": wod_selected,
+                "sex": sex_selected,
+                "level": level_selected,
+                "season": season_selected,
+                "box": box,
             }
         )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, f"classement.{export_format}")
+            with st.spinner("Export en cours..."):
+                count = export_leaderboard(path, export_format, max_rows=EXPORT_MAX_ROWS, **filters)
+            if count >= EXPORT_MAX_ROWS:
+                st.warning(
+                    f"Export limité à {EXPORT_MAX_ROWS} lignes : export complet avec "
+                    "`python -m infra.export`."
+                )
+            with open(path, "rb") as f:
+                st.download_button(
+                    f"Télécharger ({count} lignes)", f, file_name=f"classement.{export_format}"
+                )
+
+counters = cache_stats()
+st.sidebar.caption(f"Cache : {counters['hits']} hits / {counters['misses']} misses")
+
+sqltrace.end_page()
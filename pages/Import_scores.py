@@ -0,0 +1,57 @@
+import io
+
+import streamlit as st
+
+from infra import sqltrace
+from infra.auth import current_box, current_user, is_coach
+from infra.score_import import CSV_COLUMNS, import_scores
+
+sqltrace.begin_page("Import_scores")
+st.title("Import des Scores (coachs / juges)")
+
+user = current_user()
+if not user:
+    st.warning("Veuillez vous connecter => onglet Authentification (Barre Laterale Gauche)")
+    sqltrace.end_page()
+    st.stop()
+
+# Réservé aux coachs : database.coach_emails / DB_COACH_EMAILS = "a@box.fr,b@box.fr"
+if not is_coach(user):
+    st.error("Import réservé aux coachs.")
+    sqltrace.end_page()
+    st.stop()
+box = current_box()
+
+st.markdown(
+    f"Fichier CSV avec l'en-tête `{','.join(CSV_COLUMNS)}` (une ligne par athlète et par WOD). "
+    "Scores : **MM:SS** ou **CAP:XX** pour les WODs au temps, répétitions sinon. "
+    f"Un score existant est remplacé. Seuls les athlètes de la box **{box}** sont importés."
+)
+uploaded = st.file_uploader("CSV de la heat", type="csv")
+dry_run = st.checkbox("Vérifier seulement (aucune écriture)")
+
+if uploaded is not None and st.button("Vérifier" if dry_run else "Importer"):
+    try:
+        report = import_scores(io.TextIOWrapper(uploaded, encoding="utf-8-sig"), dry_run, box=box)
+    except ValueError as e:
+        st.error(str(e))
+        sqltrace.end_page()
+        st.stop()
+
+    if dry_run:
+        st.info(f"{report['valid']} / {report['rows']} lignes valides.")
+    else:
+        st.success(
+            f"{report['imported']} scores importés sur {report['rows']} lignes "
+            f"({report['duration_ms']:.0f} ms)."
+        )
+    if report["errors"]:
+        st.warning(f"{len(report['errors'])} ligne(s) en erreur :")
+        st.table(
+            {
+                "Ligne": [line for line, _ in report["errors"]],
+                "Erreur": [message for _, message in report["errors"]],
+            }
+        )
+
+sqltrace.end_page()
@@ -0,0 +1,43 @@
+import streamlit as st
+
+from infra import sqltrace
+from infra.cache import cache_stats
+from infra.db import db_setting, get_engine, get_read_engine, pool_metrics
+
+sqltrace.begin_page("Monitoring")
+st.title("Monitoring")
+
+
+def show_pool(title: str, metrics: dict) -> None:
+    st.subheader(title)
+    st.caption(
+        "Pooler externe (PgBouncer / Neon) détecté"
+        if metrics.get("pooler")
+        else "Connexion directe"
+    )
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric(
+        "Connexions utilisées", f"{metrics.get('checked_out', 0)} / {metrics.get('size', 0)}"
+    )
+    col2.metric("Overflow", metrics.get("overflow", 0))
+    col3.metric("Attente moyenne", f"{metrics.get('wait_avg_ms', 0.0):.1f} ms")
+    col4.metric("Attente max", f"{metrics.get('wait_max_ms', 0.0):.1f} ms")
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Checkouts", metrics.get("checkouts", 0))
+    col2.metric("Pool saturé (attente)", metrics.get("saturated", 0))
+    col3.metric("Épuisements (timeout)", metrics.get("exhausted", 0))
+
+
+show_pool("Pool de connexions — écriture", pool_metrics(get_engine()))
+show_pool(
+    "Pool de connexions — lecture" + (" (réplique)" if db_setting("read_url") else ""),
+    pool_metrics(get_read_engine()),
+)
+
+st.subheader("Cache des résultats")
+st.table([cache_stats()])
+
+sqltrace.end_page()
+if st.button("Rafraîchir"):
+    st.rerun()
@@ -1,22 +1,26 @@
-import re
-
 import streamlit as st
 
+from infra import sqltrace
+from infra.auth import current_user
 from infra.db import get_session
-from pages.Authentification import Score, User, Wod
+from infra.models import Score
+from infra.ranking import athlete_rank
+from infra.scores import save_score
+from infra.scoring import parse_score
+from infra.wods import current_season, wod_catalog, wod_codes
 
+sqltrace.begin_page("Saisie_scores")
 st.title("Saisie des Scores des WODs")
 
-user = st.session_state.get("user")
+# Profil gardé en session depuis la connexion : aucune requête pour retrouver l'athlète
+user = current_user()
 if not user:
     st.warning(
         "Veuillez vous connecter pour enregistrer votre score => onglet Authentification (Barre Laterale Gauche)"
     )
+    sqltrace.end_page()
     st.stop()
 
-with get_session(readonly=True) as s:
-    user_db = s.query(User).filter_by(email=user["email"]).first()
-
 wod_descriptions = {
     "26.1": """
 **26.1** AMRAP 15 minutes \n
@@ -72,71 +76,71 @@ score_instructions = {
 }
 
 
-def normalize_time_score(input_str: str, timecap_seconds: int) -> int | None:
-    if not input_str:
-        return None
-    s = input_str.strip().upper()
-    m = re.match(r"^CAP:(\d{1,3})$", s)
-    if m:
-        return timecap_seconds + int(m.group(1))
-    try:
-        parts = list(map(int, s.split(":")))
-        if len(parts) == 2:
-            return parts[0] * 60 + parts[1]
-        elif len(parts) == 3:
-            return parts[0] * 3600 + parts[1] * 60 + parts[2]
-    except Exception:
-        return None
-    return None
-
+# WODs de la saison en cours visibles par la box de l'athlète : catalogue en mémoire
+catalog = wod_catalog()
+season = current_season()
+wod = st.selectbox("Sélectionner le WOD", wod_codes(season, user["box"]))
+if wod is None:
+    st.info("Aucun WOD au catalogue pour l'instant.")
+    sqltrace.end_page()
+    st.stop()
+wod_meta = catalog[wod]
+st.markdown(f"### WOD {wod}")
+st.markdown(wod_descriptions.get(wod, f"**{wod_meta.label}**"))
+st.markdown("---")
+st.markdown(score_instructions.get(wod, ""))
+st.markdown("---")
 
-if user_db:
-    wod = st.selectbox("Sélectionner le WOD", ["26.1", "26.2", "26.3"])
-    st.markdown(f"### WOD {wod}")
-    st.markdown(wod_descriptions[wod])
-    st.markdown("---")
-    st.markdown(score_instructions.get(wod, ""))
-    st.markdown("---")
+# Score existant de l'athlète : une seule requête (clé unique user_id, wod, season)
+with get_session(readonly=True) as s:
+    existing_score = (
+        s.query(Score).filter_by(user_id=user["id"], wod=wod, season=wod_meta.season).first()
+    )
 
-    with get_session(readonly=True) as s:
-        wod_meta = s.query(Wod).filter(Wod.wod == wod).first()
-        existing_score = s.query(Score).filter_by(user_id=user_db.id, wod=wod).first()
+if existing_score:
+    st.warning(f"Score actuel pour {wod} : {existing_score.score}")
+    modify = st.checkbox("Modifier votre score ?")
+else:
+    modify = True
 
-    if existing_score:
-        st.warning(f"Score actuel pour {wod} : {existing_score.score}")
-        modify = st.checkbox("Modifier votre score ?")
+if modify:
+    new_score = None
+    new_value = None
+    if wod_meta.type == "time":
+        score_input = st.text_input(
+            "Entrez votre score (format 'MM:SS' ou 'CAP:XX')",
+            existing_score.score if existing_score else "",
+        )
+        seconds = parse_score(score_input, "time", wod_meta.timecap_seconds)
+        if score_input and seconds is None:
+            st.error("Format incorrect. Utilisez 'MM:SS' ou 'CAP:XX'.")
+        new_score = score_input if seconds is not None else None
+        new_value = seconds
     else:
-        modify = True
+        reps_val = st.number_input(
+            "Entrez votre nombre de répétitions",
+            min_value=0,
+            step=1,
+            value=int(existing_score.score)
+            if (existing_score and existing_score.score.isdigit())
+            else 0,
+        )
+        new_score = str(reps_val)
+        new_value = int(reps_val)
 
-    if modify:
-        new_score = None
-        if wod_meta and wod_meta.type == "time":
-            score_input = st.text_input(
-                "Entrez votre score (format 'MM:SS' ou 'CAP:XX')",
-                existing_score.score if existing_score else "",
-            )
-            seconds = normalize_time_score(score_input, wod_meta.timecap_seconds or 0)
-            if score_input and seconds is None:
-                st.error("Format incorrect. Utilisez 'MM:SS' ou 'CAP:XX'.")
-            new_score = score_input if seconds is not None else None
-        else:
-            reps_val = st.number_input(
-                "Entrez votre nombre de répétitions",
-                min_value=0,
-                step=1,
-                value=int(existing_score.score)
-                if (existing_score and existing_score.score.isdigit())
-                else 0,
-            )
-            new_score = str(reps_val)
+    if st.button("Enregistrer" if not existing_score else "Mettre à jour"):
+        if new_score:
+            # Upsert (user_id, wod) + classement matérialisé dans la même transaction
+            with get_session() as s:
+                save_score(
+                    s, user["id"], wod, str(new_score), new_value, user["sex"], user["level"]
+                )
+            rank = athlete_rank(user["id"], season, user["sex"], user["level"]).get(wod)
+            st.success("Score enregistré avec succès !")
+            if rank:
+                st.info(
+                    f"Place {rank['place']} / {rank['total']} sur {wod} "
+                    f"(top {rank['top_percent']:.0f} % {user['sex']} {user['level']})"
+                )
 
-        if st.button("Enregistrer" if not existing_score else "Mettre à jour"):
-            if new_score:
-                with get_session() as s:
-                    if existing_score:
-                        existing_score.score = str(new_score)
-                    else:
-                        s.add(Score(user_id=user_db.id, wod=wod, score=str(new_score)))
-                st.success("Score enregistré avec succès !")
-else:
-    st.warning("Utilisateur introuvable — reconnectez-vous.")
+sqltrace.end_page()
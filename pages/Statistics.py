@@ -3,104 +3,55 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from infra.db import get_session
-from pages.Authentification import Score, User, Wod
+from infra import sqltrace
+from infra.auth import current_box
+from infra.cache import cache_stats, cached_gather
+from infra.stats import wod_statistics_async
+from infra.wods import get_wod, wod_codes
 
+sqltrace.begin_page("Statistics")
 st.title("Statistiques des Scores des WODs")
 
-
-def normalize_for_stats(value: str, wod_type: str, timecap: int | None) -> float | None:
-    """
-    - 'time' : renvoie des secondes (float), comprend 'MM:SS' et 'CAP:XX' (cap + XX).
-    - 'reps' : renvoie un entier (float) représentant les répétitions.
-    """
-    if wod_type == "time":
-        if not value:
-            return None
-        s = value.strip().upper()
-        if s.startswith("CAP:"):
-            try:
-                over = int(s.split(":")[1])
-                return float((timecap or 0) + over)
-            except Exception:
-                return None
-        try:
-            parts = list(map(int, s.split(":")))
-            if len(parts) == 2:
-                return float(parts[0] * 60 + parts[1])
-            elif len(parts) == 3:
-                return float(parts[0] * 3600 + parts[1] * 60 + parts[2])
-        except Exception:
-            return None
-        return None
-    else:
-        try:
-            return float(int(value))
-        except Exception:
-            return None
-
-
-# Charger toutes les lignes nécessaires avec jointure Wod
-with get_session(readonly=True) as s:
-    rows = (
-        s.query(
-            User.name,
-            User.sex,
-            User.level,
-            User.category,
-            Score.wod,
-            Score.score,
-            Wod.type,
-            Wod.timecap_seconds,
-        )
-        .join(Score, User.id == Score.user_id)
-        .join(Wod, Wod.wod == Score.wod)
-        .all()
-    )
-
-if not rows:
+# Statistiques de la box (celle de l'athlète connecté, sinon celle du déploiement).
+# Agrégats lus dans les sketches de quantiles (sans parcourir les scores), pour tous les WODs
+# du catalogue en parallèle (au plus la taille du pool de lecture à la fois, cf.
+# infra.db.fetch_all) : changer de WOD ensuite ne coûte aucune requête
+box = current_box()
+catalog_wods = sorted(wod_codes(None, box), key=lambda w: -get_wod(w).season)
+all_stats = cached_gather("statistics", *((wod_statistics_async, (w, box)) for w in catalog_wods))
+stats_by_wod = {w: s for w, s in zip(catalog_wods, all_stats, strict=True) if s is not None}
+wods = list(stats_by_wod)  # WODs ayant au moins un score, saison récente d'abord
+counters = cache_stats()
+st.sidebar.caption(f"Cache : {counters['hits']} hits / {counters['misses']} misses")
+
+if not wods:
     st.info("Aucune donnée.")
+    sqltrace.end_page()
     st.stop()
 
-data = pd.DataFrame(
-    rows, columns=["Nom", "Sexe", "Niveau", "Catégorie", "WOD", "ScoreBrut", "Type", "CapSec"]
-)
-# Normaliser en valeur numérique exploitable
-data["Score"] = data.apply(
-    lambda r: normalize_for_stats(r["ScoreBrut"], r["Type"], r["CapSec"]), axis=1
-)
-
 st.subheader("Statistiques par WOD")
-# WODs disponibles depuis la table
-wods = sorted(data["WOD"].unique().tolist())
-wod_selected = st.selectbox("Choisissez un WOD", wods, index=0 if wods else None)
+wod_selected = st.selectbox("Choisissez un WOD", wods, index=0)
 
-subset = data[(data["WOD"] == wod_selected)].copy()
-if subset.empty:
-    st.info("Aucune donnée pour ce WOD.")
-    st.stop()
+stats = stats_by_wod[wod_selected]
 
 # Percentiles séparés H/F
 percentiles = np.arange(0, 101, 10)
-male = subset[subset["Sexe"] == "Male"]["Score"].dropna()
-female = subset[subset["Sexe"] == "Female"]["Score"].dropna()
+male = stats["by_sex"].get("Male") or {}
+female = stats["by_sex"].get("Female") or {}
+
+
+def _deciles(sex_stats: dict) -> np.ndarray:
+    deciles = sex_stats.get("deciles")
+    return np.asarray(deciles) if deciles else np.zeros_like(percentiles)
+
 
 # Pour les 'time', score = secondes => percentiles inversés pour tracer des 'meilleurs = plus bas'
-is_time = subset["Type"].iloc[0] == "time"
+is_time = stats["type"] == "time"
+male_percentiles = _deciles(male)
+female_percentiles = _deciles(female)
 if is_time:
-    male_percentiles = (
-        np.percentile(male, 100 - percentiles) if not male.empty else np.zeros_like(percentiles)
-    )
-    female_percentiles = (
-        np.percentile(female, 100 - percentiles) if not female.empty else np.zeros_like(percentiles)
-    )
-else:
-    male_percentiles = (
-        np.percentile(male, percentiles) if not male.empty else np.zeros_like(percentiles)
-    )
-    female_percentiles = (
-        np.percentile(female, percentiles) if not female.empty else np.zeros_like(percentiles)
-    )
+    male_percentiles = male_percentiles[::-1]
+    female_percentiles = female_percentiles[::-1]
 
 df_plot = pd.DataFrame(
     {
@@ -123,13 +74,17 @@ fig = px.line(
 st.plotly_chart(fig)
 
 # Statistiques complémentaires
+male_mean = male.get("mean") or 0
+female_mean = female.get("mean") or 0
 if is_time:
     st.subheader("Statistiques Temps")
-    male_mean = male.mean() if not male.empty else 0
-    female_mean = female.mean() if not female.empty else 0
-    time_cap = int(subset["CapSec"].iloc[0] or 0)
-    pct_m_before = (male < time_cap).mean() * 100 if (time_cap and not male.empty) else 0
-    pct_f_before = (female < time_cap).mean() * 100 if (time_cap and not female.empty) else 0
+    time_cap = int(stats["timecap"] or 0)
+    pct_m_before = (
+        male["before_cap"] / male["scored"] * 100 if (time_cap and male.get("scored")) else 0
+    )
+    pct_f_before = (
+        female["before_cap"] / female["scored"] * 100 if (time_cap and female.get("scored")) else 0
+    )
 
     st.write(f"Temps moyen Hommes : {male_mean:.2f} s")
     st.write(f"Temps moyen Femmes : {female_mean:.2f} s")
@@ -138,14 +93,12 @@ if is_time:
         st.write(f"Femmes terminant avant cap : {pct_f_before:.2f}%")
 else:
     st.subheader("Statistiques Répétitions")
-    male_mean = male.mean() if not male.empty else 0
-    female_mean = female.mean() if not female.empty else 0
     st.write(f"Répétitions moyennes Hommes : {male_mean:.0f}")
     st.write(f"Répétitions moyennes Femmes : {female_mean:.0f}")
 
 # Répartition des participants par sexe et niveau
 st.subheader("Répartition des Participants par Sexe et Niveau")
-gender_level_count = subset.groupby(["Sexe", "Niveau"]).size().reset_index(name="Nombre")
+gender_level_count = pd.DataFrame(stats["participants"], columns=["Sexe", "Niveau", "Nombre"])
 fig_level = px.bar(
     gender_level_count,
     x="Niveau",
@@ -157,3 +110,5 @@ fig_level = px.bar(
     color_discrete_map={"Male": "#89b385", "Female": "#dcaa78"},
 )
 st.plotly_chart(fig_level)
+
+sqltrace.end_page()
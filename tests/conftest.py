@@ -0,0 +1,66 @@
+# tests/conftest.py
+"""
+Base SQLite temporaire, migrée une fois pour la session de tests (DATABASE_URL posé avant
+tout import de infra.*). Chaque test crée ses propres athlètes et WODs (codes distincts) :
+aucun nettoyage entre les tests.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_DB = Path(tempfile.mkdtemp()) / "tests.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB}"
+
+_EMAILS = itertools.count(1)
+
+_USER_SQL = """
+    INSERT INTO users (name, email, password, sex, birth_year, level, category, age, box)
+    VALUES (:name, :email, 'x', :sex, 1990, :level, '35-39', 36, :box)
+    RETURNING id
+"""
+
+
+@pytest.fixture(scope="session")
+def engine():
+    from infra.db import get_engine
+    from infra.migrations import migrate
+
+    migrate(get_engine(check_schema=False))
+    return get_engine()
+
+
+@pytest.fixture
+def add_user(engine):
+    """add_user(name, sex='Male', level='RX', box='main') -> (id, email)."""
+    from sqlalchemy import text
+
+    def _add(name: str, sex: str = "Male", level: str = "RX", box: str = "main"):
+        email = f"athlete{next(_EMAILS)}@tests.local"
+        with engine.begin() as conn:
+            user_id = conn.execute(
+                text(_USER_SQL),
+                {"name": name, "email": email, "sex": sex, "level": level, "box": box},
+            ).scalar_one()
+        return user_id, email
+
+    return _add
+
+
+@pytest.fixture
+def add_wod(engine):
+    """add_wod(code, wod_type, timecap=None, season=2030) : WOD officiel du catalogue."""
+    from infra.db import get_session
+    from infra.wods import save_wod
+
+    def _add(code: str, wod_type: str, timecap: int | None = None, season: int = 2030):
+        with get_session() as s:
+            save_wod(s, code, f"Test {code}", wod_type, timecap, season)
+        return code
+
+    return _add
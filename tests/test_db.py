@@ -0,0 +1,49 @@
+# tests/test_db.py
+"""
+URL de l'engine asyncio : paramètres libpq traduits ou retirés pour asyncpg.
+reset_engines : rien de l'ancienne URL ne survit (engines, read-only par transaction).
+"""
+
+from __future__ import annotations
+
+from sqlalchemy.engine import make_url
+
+from infra import db
+from infra.db import async_connect_args, async_url, reset_engines
+
+NEON_URL = (
+    "postgresql://user:pw@ep-x-pooler.eu-central-1.aws.neon.tech/neondb"
+    "?sslmode=require&channel_binding=require"
+)
+
+
+def test_async_url_strips_libpq_params():
+    url = make_url(async_url(NEON_URL))
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"prepared_statement_cache_size": "0"}  # hôte '-pooler'
+    assert async_connect_args(NEON_URL) == {"ssl": "require"}
+
+
+def test_async_connect_args_translation():
+    url = "postgresql://u@db/app?sslmode=verify-full&connect_timeout=5&application_name=open"
+    assert make_url(async_url(url)).query == {}
+    assert async_connect_args(url) == {
+        "ssl": "verify-full",
+        "timeout": 5.0,
+        "server_settings": {"application_name": "open"},
+    }
+
+
+def test_async_url_sqlite():
+    assert async_url("sqlite:///bench.db") == "sqlite+aiosqlite:///bench.db"
+    assert async_connect_args("sqlite:///bench.db") == {}
+
+
+def test_reset_engines_forgets_read_only_mode(monkeypatch):
+    # Engines créés pour une URL de pooler (read-only posé par transaction)...
+    monkeypatch.setattr(db, "_READ_ONLY_PER_TRANSACTION", True)
+    monkeypatch.setattr(db, "_ASYNC_READ_ONLY_PER_TRANSACTION", True)
+    reset_engines()
+    # ... puis une URL directe : plus de SET par transaction hérité
+    assert db._READ_ONLY_PER_TRANSACTION is False
+    assert db._ASYNC_READ_ONLY_PER_TRANSACTION is False
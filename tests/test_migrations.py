@@ -0,0 +1,86 @@
+# tests/test_migrations.py
+"""Montée de version d'une base créée par le code d'origine (create_all + bootstrap)."""
+
+from __future__ import annotations
+
+from sqlalchemy import create_engine, inspect, text
+
+from infra.migrations import SCHEMA_VERSION, current_version, migrate
+
+# Schéma et seed du code d'origine (modèles déclarés dans pages/Authentification.py)
+_BASELINE_SQL = """
+CREATE TABLE users (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    sex VARCHAR(10) NOT NULL,
+    birth_year INTEGER NOT NULL,
+    level VARCHAR(10) NOT NULL,
+    category VARCHAR(20) NOT NULL,
+    age INTEGER NOT NULL
+);
+CREATE TABLE scores (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    wod VARCHAR(10) NOT NULL,
+    score VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE wods (
+    wod VARCHAR(10) PRIMARY KEY,
+    label VARCHAR(100) NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    timecap_seconds INTEGER
+);
+INSERT INTO wods (wod, label, type, timecap_seconds) VALUES
+    ('26.1', 'Open 26.1', 'reps', NULL),
+    ('26.2', 'Open 26.2', 'time', 12*60),
+    ('26.3', 'Open 26.3', 'time', 20*60);
+CREATE INDEX idx_scores_user_wod ON scores(user_id, wod);
+CREATE INDEX idx_users_sex_level ON users(sex, level);
+INSERT INTO users (id, name, email, password, sex, birth_year, level, category, age) VALUES
+    (1, 'A', 'a@example.com', 'x', 'Male', 1990, 'RX', '35-39', 36),
+    (2, 'B', 'b@example.com', 'x', 'Male', 1992, 'RX', '30-34', 34);
+INSERT INTO scores (user_id, wod, score) VALUES
+    (1, '26.1', '150'), (2, '26.1', '120'), (1, '26.2', '9:30');
+"""
+
+
+def test_upgrade_from_baseline_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as conn:
+        for statement in filter(str.strip, _BASELINE_SQL.split(";")):
+            conn.execute(text(statement))
+
+    migrate(engine)
+
+    assert current_version(engine) == SCHEMA_VERSION
+    with engine.connect() as conn:
+        assert "season" in {c["name"] for c in inspect(conn).get_columns("wods")}
+        seasons = conn.execute(text("SELECT DISTINCT season FROM wods")).scalars().all()
+        assert seasons == [2026]
+        scores = conn.execute(
+            text("SELECT user_id, wod, season, box, score_value FROM scores ORDER BY id")
+        ).all()
+        assert [(u, w, s) for u, w, s, _, _ in scores] == [
+            (1, "26.1", 2026),
+            (2, "26.1", 2026),
+            (1, "26.2", 2026),
+        ]
+        assert all(value is not None for *_, value in scores)
+        places = conn.execute(
+            text(
+                "SELECT user_id, place FROM leaderboard WHERE wod = '26.1' "
+                "AND season = 2026 ORDER BY place"
+            )
+        ).all()
+        assert [tuple(p) for p in places] == [(1, 1), (2, 2)]
+
+
+def test_fresh_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    migrate(engine)
+    with engine.connect() as conn:
+        seasons = conn.execute(text("SELECT wod, season FROM wods ORDER BY wod")).all()
+    assert [tuple(s) for s in seasons] == [("26.1", 2026), ("26.2", 2026), ("26.3", 2026)]
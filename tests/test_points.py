@@ -0,0 +1,79 @@
+# tests/test_points.py
+"""Moteur de points de l'Overall : ex aequo, scores invalides, WODs non saisis."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from infra.db import get_session
+from infra.points import min_rank, overall_points
+from infra.ranking import classement_overall, leaderboard_overall
+from infra.scores import save_score
+from infra.scoring import parse_score
+
+# Division à la main (reps : plus grand est meilleur ; time : plus petit est meilleur)
+#            T19.1 (reps)   T19.2 (time)     T19.3 (reps)   points  place
+#   A        100 -> 1       5:00 -> 2        50 -> 2        5       1
+#   B        100 -> 1       4:10 -> 1        -  -> 3        5       1
+#   C         90 -> 3       5:00 -> 2        60 -> 1        6       3
+#   D   invalide -> 4       -    -> 4        -  -> 3        11      4
+SCORES = {
+    "A": {"T19.1": "100", "T19.2": "5:00", "T19.3": "50"},
+    "B": {"T19.1": "100", "T19.2": "4:10"},
+    "C": {"T19.1": "90", "T19.2": "5:00", "T19.3": "60"},
+    "D": {"T19.1": "abc"},
+}
+EXPECTED = {
+    "A": ({"T19.1": 1, "T19.2": 2, "T19.3": 2}, 5, 1),
+    "B": ({"T19.1": 1, "T19.2": 1, "T19.3": 3}, 5, 1),
+    "C": ({"T19.1": 3, "T19.2": 2, "T19.3": 1}, 6, 3),
+    "D": ({"T19.1": 4, "T19.2": 4, "T19.3": 3}, 11, 4),
+}
+WOD_TYPES = {"T19.1": "reps", "T19.2": "time", "T19.3": "reps"}
+
+
+def test_min_rank_ties():
+    assert min_rank(np.array([3.0, 1.0, 3.0, 2.0, 1.0])).tolist() == [4, 1, 4, 3, 1]
+
+
+def test_overall_points_hand_built():
+    rows = [
+        (name, wod, parse_score(score, WOD_TYPES[wod], 600))
+        for name, scores in SCORES.items()
+        for wod, score in scores.items()
+    ]
+    ids = {name: i for i, name in enumerate(SCORES, start=1)}
+    table = overall_points(
+        [ids[name] for name, _, _ in rows],
+        [wod for _, wod, _ in rows],
+        [value for _, _, value in rows],
+        {wod: wod_type != "time" for wod, wod_type in WOD_TYPES.items()},
+    )
+    for name, (places, points, place) in EXPECTED.items():
+        row = table.loc[ids[name]]
+        assert {wod: row[wod] for wod in WOD_TYPES} == places
+        assert (row["points"], row["place"]) == (points, place)
+
+
+def test_classement_overall_matches_leaderboard(add_user, add_wod):
+    for wod, wod_type in WOD_TYPES.items():
+        add_wod(wod, wod_type, 600 if wod_type == "time" else None, season=2031)
+    ids = {name: add_user(name, box="t19")[0] for name in SCORES}
+    with get_session() as s:
+        for name, scores in SCORES.items():
+            for wod, score in scores.items():
+                value = parse_score(score, WOD_TYPES[wod], 600)
+                save_score(s, ids[name], wod, score, value, "Male", "RX")
+
+    # Moteur vectorisé (à la volée) : places par WOD, total et place Overall
+    computed = classement_overall(2031, "Male", "RX", list(WOD_TYPES), box="t19")
+    by_id = {row["user_id"]: row for row in computed}
+    for name, (places, points, place) in EXPECTED.items():
+        row = by_id[ids[name]]
+        assert (row["places"], row["points"], row["place"]) == (places, points, place)
+
+    # Mêmes totaux et places que l'Overall matérialisé (SQL de infra.ranking)
+    materialized = leaderboard_overall(2031, "Male", "RX", box="t19")
+    assert {r["user_id"]: (r["points"], r["place"]) for r in materialized} == {
+        user_id: (row["points"], row["place"]) for user_id, row in by_id.items()
+    }
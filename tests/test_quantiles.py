@@ -0,0 +1,75 @@
+# tests/test_quantiles.py
+"""Sketch de quantiles : fusion comparée aux quantiles exacts, sérialisation aller-retour."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from infra.quantiles import QuantileSketch
+
+QS = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def _values(seed: int = 19) -> np.ndarray:
+    # Temps en secondes (distribution asymétrique, nombreux ex aequo à la seconde)
+    rng = np.random.default_rng(seed)
+    return np.round(rng.lognormal(mean=6.3, sigma=0.25, size=20_000))
+
+
+def _rank_error(values: np.ndarray, estimates: list[float]) -> float:
+    # Écart de rang (en fraction de l'effectif) entre quantile estimé et quantile demandé
+    ordered = np.sort(values)
+    lo = np.searchsorted(ordered, estimates, side="left") / ordered.size
+    hi = np.searchsorted(ordered, estimates, side="right") / ordered.size
+    q = np.asarray(QS)
+    return float(np.max(np.where(q < lo, lo - q, np.where(q > hi, q - hi, 0.0))))
+
+
+def test_merge_matches_exact_quantiles():
+    values = _values()
+    # Trois « divisions » construites différemment : directe, incrémentale, mixte
+    first = QuantileSketch.from_values(values[:8_000])
+    second = QuantileSketch()
+    for value in values[8_000:15_000]:
+        second.add(value)
+    third = QuantileSketch.from_values(values[15_000:17_000])
+    for value in values[17_000:]:
+        third.add(value)
+
+    merged = first.merge(second, third)
+    assert merged.count == values.size
+    assert (merged.min, merged.max) == (values.min(), values.max())
+    assert merged.mean() == pytest.approx(values.mean(), rel=1e-9)
+    assert _rank_error(values, merged.quantiles(QS)) < 0.01
+    # La fusion ne modifie pas ses opérandes
+    assert first.count + second.count + third.count == values.size
+
+
+def test_serialization_round_trip():
+    values = _values(seed=5)
+    sketch = QuantileSketch.from_values(values[:10_000])
+    for value in values[10_000:]:
+        sketch.add(value)
+
+    restored = QuantileSketch.from_bytes(sketch.to_bytes())
+    assert restored.compression == sketch.compression
+    assert restored.count == sketch.count
+    assert (restored.min, restored.max) == (sketch.min, sketch.max)
+    # Centroïdes en float32 : moyenne et quantiles à ~1e-7 près
+    assert restored.mean() == pytest.approx(sketch.mean(), rel=1e-6)
+    assert restored.quantiles(QS) == pytest.approx(sketch.quantiles(QS), rel=1e-6)
+    assert restored.to_bytes() == sketch.to_bytes()
+
+    # Un sketch restauré reste fusionnable
+    merged = restored.merge(QuantileSketch.from_values(values[:100]))
+    assert merged.count == values.size + 100
+
+
+def test_empty_sketch_and_unknown_format():
+    empty = QuantileSketch.from_bytes(QuantileSketch().to_bytes())
+    assert (empty.count, empty.mean(), empty.quantiles(QS)) == (0, None, None)
+    blob = bytearray(QuantileSketch.from_values([1.0, 2.0]).to_bytes())
+    blob[0] = 99
+    with pytest.raises(ValueError, match="Format de sketch inconnu"):
+        QuantileSketch.from_bytes(bytes(blob))
@@ -0,0 +1,68 @@
+# tests/test_ranking.py
+"""Pagination par curseur (place, user_id) : ex aequo à cheval sur deux pages."""
+
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from infra.db import get_session
+from infra.ranking import leaderboard_overall_page, leaderboard_wod_page
+from infra.scores import save_score
+
+# Groupes d'ex aequo de 3, 4, 2 et 2 athlètes : avec des pages de 3 (ou 2), chaque groupe
+# déborde sur la page suivante
+SCORES = [100, 100, 100, 90, 90, 90, 90, 80, 80, 70, 70]
+PLACES = [1, 1, 1, 4, 4, 4, 4, 8, 8, 10, 10]
+
+_DIVISIONS = itertools.count(1)
+
+
+@pytest.fixture
+def division(add_user, add_wod):
+    # Une box (et un WOD) par test : divisions indépendantes
+    n = next(_DIVISIONS)
+    box, wod = f"t17-{n}", add_wod(f"T17.{n}", "reps")
+    # Insertion dans le désordre : l'ordre de pagination ne dépend que de (place, user_id)
+    users = [add_user(f"Tie {i}", box=box)[0] for i in range(len(SCORES))]
+    with get_session() as s:
+        for user_id, score in reversed(list(zip(users, SCORES, strict=True))):
+            save_score(s, user_id, wod, str(score), score, "Male", "RX")
+    return wod, box, users
+
+
+def _all_pages(fetch, limit: int) -> list[list[dict]]:
+    pages, after = [], None
+    while True:
+        page = fetch(after=after, limit=limit)
+        pages.append(page["rows"])
+        after = page["next"]
+        if after is None:
+            return pages
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, len(SCORES), 50])
+def test_wod_pages_never_skip_or_repeat(division, limit):
+    wod, box, users = division
+    pages = _all_pages(
+        lambda **kw: leaderboard_wod_page(wod, 2030, "Male", "RX", box=box, **kw), limit
+    )
+    rows = [row for page in pages for row in page]
+
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+    assert [r["user_id"] for r in rows] == users
+    assert [r["place"] for r in rows] == PLACES
+
+
+@pytest.mark.parametrize("limit", [2, 3])
+def test_overall_pages_never_skip_or_repeat(division, limit):
+    _, box, users = division
+    pages = _all_pages(
+        lambda **kw: leaderboard_overall_page(2030, "Male", "RX", box=box, **kw), limit
+    )
+    rows = [row for page in pages for row in page]
+
+    assert [r["user_id"] for r in rows] == users
+    assert [r["place"] for r in rows] == PLACES
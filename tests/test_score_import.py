@@ -0,0 +1,44 @@
+# tests/test_score_import.py
+"""Import CSV : filtre de box optionnel, athlètes de plusieurs boxes dans un même fichier."""
+
+from __future__ import annotations
+
+import io
+
+from sqlalchemy import text
+
+from infra.db import get_session
+from infra.score_import import import_scores
+
+
+def _csv(*lines: str) -> io.StringIO:
+    return io.StringIO("email,wod,score\n" + "\n".join(lines) + "\n")
+
+
+def test_import_mixed_boxes(add_user, add_wod):
+    wod = add_wod("T14.1", "reps")
+    main_id, main_email = add_user("Main", box="main")
+    other_id, other_email = add_user("Other", box="other")
+    stream = _csv(f"{main_email},{wod},100", f"{other_email},{wod},90")
+
+    # Sans filtre : chaque athlète est importé dans sa propre box
+    report = import_scores(stream)
+    assert report["errors"] == []
+    assert report["imported"] == 2
+    with get_session(readonly=True) as s:
+        rows = s.execute(
+            text("SELECT user_id, box FROM scores WHERE wod = :wod ORDER BY user_id"),
+            {"wod": wod},
+        ).all()
+    assert [tuple(r) for r in rows] == sorted([(main_id, "main"), (other_id, "other")])
+
+
+def test_import_restricted_to_box(add_user, add_wod):
+    wod = add_wod("T14.2", "reps")
+    _, main_email = add_user("Main", box="main")
+    _, other_email = add_user("Other", box="other")
+    stream = _csv(f"{other_email},{wod},90", f"{main_email},{wod},100")
+
+    report = import_scores(stream, dry_run=True, box="main")
+    assert report["valid"] == 1
+    assert report["errors"] == [(2, f"Athlète hors de la box 'main' : '{other_email}'")]
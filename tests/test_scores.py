@@ -0,0 +1,46 @@
+# tests/test_scores.py
+"""upsert_score sur SQLite : insertion, remplacement ('replaced'), score invalide, inconnus."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+
+from infra.db import get_session
+from infra.scores import upsert_score
+
+
+def test_upsert_new_replace_invalid(add_user, add_wod):
+    wod = add_wod("T13.1", "reps")
+    user_id, _ = add_user("Upsert", box="t13")
+
+    with get_session() as s:
+        first_id, replaced, box = upsert_score(s, user_id, wod, "100", 100)
+    assert (replaced, box) == (False, "t13")
+
+    with get_session() as s:
+        second_id, replaced, box = upsert_score(s, user_id, wod, "120", 120)
+    assert (second_id, replaced, box) == (first_id, True, "t13")
+
+    # Score invalide (score_value NULL) : remplace aussi la ligne existante
+    with get_session() as s:
+        third_id, replaced, _ = upsert_score(s, user_id, wod, "abc", None)
+    assert (third_id, replaced) == (first_id, True)
+
+    with get_session(readonly=True) as s:
+        rows = s.execute(
+            text("SELECT score, score_value, season FROM scores WHERE user_id = :u"),
+            {"u": user_id},
+        ).all()
+    assert [tuple(r) for r in rows] == [("abc", None, 2030)]
+
+
+def test_upsert_unknown_wod_or_athlete(add_user, add_wod):
+    wod = add_wod("T13.2", "reps")
+    user_id, _ = add_user("Inconnu")
+
+    with get_session() as s:
+        with pytest.raises(ValueError, match="inconnu"):
+            upsert_score(s, user_id, "T13.404", "100", 100)
+        with pytest.raises(ValueError, match="inconnu"):
+            upsert_score(s, 10**9, wod, "100", 100)
@@ -0,0 +1,58 @@
+# tests/test_scoring.py
+"""parse_scores (colonnes, RE2 via pyarrow) et parse_score (ligne à ligne) : même parseur."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+
+from infra.scoring import parse_score, parse_scores
+
+# (score brut, type de WOD, timecap)
+CASES = [
+    # reps
+    ("150", "reps", None),
+    (" 42 ", "reps", None),
+    ("0", "reps", None),
+    ("12:30", "reps", None),
+    ("CAP:10", "reps", None),
+    # temps
+    ("12:30", "time", 1200),
+    ("1:02:03", "time", 3600),
+    ("0:59", "time", None),
+    ("cap:15", "time", 900),
+    ("Cap:7", "time", None),
+    (" CAP:120 ", "time", 600),
+    ("150", "time", 600),
+    # invalides
+    ("CAP:1000", "time", 600),
+    ("CAP:", "time", 600),
+    ("12:3a", "time", 600),
+    ("-5", "reps", None),
+    ("1.5", "reps", None),
+    ("", "reps", None),
+    ("   ", "time", 600),
+    (None, "reps", None),
+    (None, "time", 600),
+]
+
+
+def _expected(case):
+    value = parse_score(*case)
+    return math.nan if value is None else float(value)
+
+
+def test_parse_scores_matches_parse_score():
+    values, wod_types, timecaps = zip(*CASES, strict=True)
+    parsed = parse_scores(list(values), list(wod_types), list(timecaps))
+    expected = np.array([_expected(case) for case in CASES])
+    np.testing.assert_array_equal(parsed, expected)
+
+
+def test_parse_scores_scalar_type_and_timecap():
+    values = ["10:00", "CAP:5", "bad", None]
+    parsed = parse_scores(values, "time", 600)
+    expected = np.array([_expected((v, "time", 600)) for v in values])
+    np.testing.assert_array_equal(parsed, expected)
+    assert parsed.tolist()[:2] == [600.0, 605.0]